@@ -0,0 +1,166 @@
+import os
+import sqlite3
+import logging
+import concurrent.futures
+from array import array
+from scanner import DuplicateScanner
+from lazy_imports import lazy_import, module_available
+
+np = lazy_import("numpy") if module_available("numpy") else None
+
+
+class AICache:
+    """
+    Persists AI results (NSFW scores, face encodings) keyed by the file's
+    SHA-256 content hash, as computed by DuplicateScanner.get_full_hash, and
+    the model that produced them. Renamed, moved or duplicated files hit the
+    cache as long as their bytes are unchanged.
+    A second table remembers each path's hash for its (size, mtime), so
+    unchanged files are not even re-read to be hashed.
+    """
+    # Keys per SELECT, below SQLite's bound-parameter limit
+    QUERY_BATCH = 500
+
+    def __init__(self, db_path="ai_cache.db", scanner=None, max_workers=8):
+        self.db_path = db_path
+        self.scanner = scanner or DuplicateScanner()
+        self.max_workers = max_workers
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def init_db(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime REAL,
+                hash TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS nsfw (
+                hash TEXT,
+                model TEXT,
+                score REAL,
+                PRIMARY KEY (hash, model)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS faces (
+                hash TEXT,
+                model TEXT,
+                face_count INTEGER,
+                encodings BLOB,
+                PRIMARY KEY (hash, model)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def _select(self, query, keys, extra_params=()):
+        """Runs query (with a {keys} placeholder) over keys in batches and returns all rows."""
+        keys = list(keys)
+        rows = []
+        conn = self._connect()
+        for start in range(0, len(keys), self.QUERY_BATCH):
+            batch = keys[start:start + self.QUERY_BATCH]
+            rows.extend(conn.execute(query.format(keys=", ".join("?" * len(batch))),
+                                     (*extra_params, *batch)).fetchall())
+        conn.close()
+        return rows
+
+    # --- Content hashes -----------------------------------------------------
+
+    def content_hashes(self, paths):
+        """
+        Returns {path: content hash} for the readable paths. Hashes recorded
+        for the same size and mtime are reused; the rest are hashed on a
+        thread pool and recorded.
+        """
+        stats = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+                stats[path] = (st.st_size, st.st_mtime)
+            except OSError as e:
+                logging.warning(f"Could not access {path}: {e}")
+
+        hashes = {}
+        for path, size, mtime, content_hash in self._select(
+                'SELECT path, size, mtime, hash FROM file_hashes WHERE path IN ({keys})', stats):
+            if stats[path] == (size, mtime):
+                hashes[path] = content_hash
+
+        missing = [path for path in stats if path not in hashes]
+        logging.info(f"AI cache: {len(hashes)} known hashes, {len(missing)} files to hash")
+        computed = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for path, content_hash in zip(missing, executor.map(self.scanner.get_full_hash, missing)):
+                if content_hash:
+                    hashes[path] = content_hash
+                    computed.append((path, *stats[path], content_hash))
+
+        if computed:
+            conn = self._connect()
+            conn.executemany('INSERT OR REPLACE INTO file_hashes (path, size, mtime, hash) VALUES (?, ?, ?, ?)',
+                             computed)
+            conn.commit()
+            conn.close()
+        return hashes
+
+    # --- NSFW scores --------------------------------------------------------
+
+    def get_nsfw(self, hashes, model):
+        """Returns {hash: score} for the hashes classified by model."""
+        return dict(self._select('SELECT hash, score FROM nsfw WHERE model = ? AND hash IN ({keys})',
+                                 set(hashes), (model,)))
+
+    def put_nsfw(self, scores, model):
+        """Stores (hash, score) pairs."""
+        conn = self._connect()
+        conn.executemany('INSERT OR REPLACE INTO nsfw (hash, model, score) VALUES (?, ?, ?)',
+                         ((content_hash, model, score) for content_hash, score in scores))
+        conn.commit()
+        conn.close()
+
+    # --- Face encodings -----------------------------------------------------
+
+    def get_faces(self, hashes, model):
+        """Returns {hash: [encoding, ...]} for the hashes scanned by model (an empty list means no faces)."""
+        results = {}
+        for content_hash, count, blob in self._select(
+                'SELECT hash, face_count, encodings FROM faces WHERE model = ? AND hash IN ({keys})',
+                set(hashes), (model,)):
+            results[content_hash] = self._decode(blob, count)
+        return results
+
+    def put_faces(self, faces, model):
+        """Stores (hash, encodings) pairs."""
+        conn = self._connect()
+        conn.executemany('INSERT OR REPLACE INTO faces (hash, model, face_count, encodings) VALUES (?, ?, ?, ?)',
+                         ((content_hash, model, len(encodings), self._encode(encodings))
+                          for content_hash, encodings in faces))
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _encode(encodings):
+        data = array('d')
+        for encoding in encodings:
+            data.extend(encoding)
+        return data.tobytes()
+
+    @staticmethod
+    def _decode(blob, count):
+        if not count:
+            return []
+        if np is not None:
+            return list(np.frombuffer(blob, dtype=np.float64).reshape(count, -1))
+        data = array('d')
+        data.frombytes(blob)
+        width = len(data) // count
+        return [data[i * width:(i + 1) * width] for i in range(count)]
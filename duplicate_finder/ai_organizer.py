@@ -1,133 +1,212 @@
 import os
 import shutil
 import logging
+import threading
+from name_allocator import UniqueNameAllocator
+from skin_detection import SKIN_DETECTION_AVAILABLE, SKIN_MODEL, skin_score
+from video_frames import is_video, keyframes
+from face_pipeline import FacePipeline
+from face_clustering import CLUSTERING_AVAILABLE, FaceClusterIndex, NOISE, encoding_matrix
+from lazy_imports import lazy_import, module_available
 
-# Optional imports for AI features
-try:
-    from nudenet import NudeDetector
-    NUDENET_AVAILABLE = True
-except ImportError:
-    NUDENET_AVAILABLE = False
+# Optional AI features. Availability is probed without importing anything;
+# the packages and models load on first use, so starting the app stays fast.
+nudenet = lazy_import("nudenet")
+NUDENET_AVAILABLE = module_available("nudenet")
+if not NUDENET_AVAILABLE:
     logging.warning("NudeNet not installed. NSFW detection disabled.")
 
-try:
-    import face_recognition
-    import cv2
-    import numpy as np
-    from sklearn.cluster import DBSCAN
-    FACE_RECOGNITION_AVAILABLE = True
-except ImportError:
-    FACE_RECOGNITION_AVAILABLE = False
-    logging.warning("face_recognition, cv2, or sklearn not installed. Face grouping disabled.")
+FACE_RECOGNITION_AVAILABLE = module_available("face_recognition", "cv2", "numpy")
+if not FACE_RECOGNITION_AVAILABLE:
+    logging.warning("face_recognition, cv2, or numpy not installed. Face grouping disabled.")
+
+NSFW_CLASSES = {
+    'BUTTOCKS_EXPOSED', 'FEMALE_BREAST_EXPOSED', 'FEMALE_GENITALIA_EXPOSED',
+    'MALE_BREAST_EXPOSED', 'MALE_GENITALIA_EXPOSED', 'ANUS_EXPOSED'
+}
+
+
+# Keyframes sampled per video for NSFW scoring
+VIDEO_KEYFRAMES = 8
+
+# Cache key for face encodings produced by face_recognition's default (HOG) detector
+# on images downscaled to face_pipeline.DETECT_MAX_SIDE
+FACE_MODEL = "face_recognition/hog/1024"
+
+
+_nude_detector = None
+_nude_detector_lock = threading.Lock()
+
+
+def get_nude_detector():
+    """
+    Returns the process-wide NudeDetector, loading it on first call.
+    Returns None if NudeNet is unavailable or its model failed to load.
+    """
+    global _nude_detector
+    with _nude_detector_lock:
+        if _nude_detector is None:
+            _nude_detector = False
+            if NUDENET_AVAILABLE:
+                try:
+                    _nude_detector = nudenet.NudeDetector()
+                except Exception as e:
+                    logging.error(f"Failed to initialize NudeDetector: {e}")
+        return _nude_detector or None
+
+
+def detections_score(preds):
+    """Highest score among NudeNet's exposed-class detections, 0.0 if there are none."""
+    return max((pred['score'] for pred in preds if pred['class'] in NSFW_CLASSES), default=0.0)
+
 
 class AIOrganizer:
     def __init__(self):
-        self.nude_detector = None
-        if NUDENET_AVAILABLE:
-            try:
-                self.nude_detector = NudeDetector()
-            except Exception as e:
-                logging.error(f"Failed to initialize NudeDetector: {e}")
+        self.name_allocator = UniqueNameAllocator()
+
+    @property
+    def nude_detector(self):
+        """The shared NudeDetector, loaded when first needed (None without NudeNet)."""
+        return get_nude_detector()
 
-    def is_nsfw(self, file_path):
+    @property
+    def nsfw_model(self):
+        """Name of the classifier behind nsfw_score, used as the AI cache key."""
+        return "nudenet" if NUDENET_AVAILABLE and self.nude_detector else SKIN_MODEL
+
+    def is_nsfw(self, file_path, threshold=0.5):
         """
         Checks if an image or video contains explicit content.
         Returns True if unsafe, False otherwise.
         """
+        return self.nsfw_score(file_path) > threshold
+
+    def nsfw_score(self, file_path, stop_above=0.5):
+        """
+        Returns the highest exposed-class score from NudeNet, or 1.0/0.0 from
+        the skin heuristic when NudeNet is unavailable.
+        Videos are scored on sampled keyframes; sampling stops at the first
+        frame scoring above stop_above.
+        """
         # Try NudeNet first if available
         if NUDENET_AVAILABLE and self.nude_detector:
             try:
-                preds = self.nude_detector.detect(file_path)
-                for pred in preds:
-                    if pred['class'] in [
-                        'BUTTOCKS_EXPOSED', 'FEMALE_BREAST_EXPOSED', 'FEMALE_GENITALIA_EXPOSED', 
-                        'MALE_BREAST_EXPOSED', 'MALE_GENITALIA_EXPOSED', 'ANUS_EXPOSED'
-                    ]:
-                        if pred['score'] > 0.5:
-                            return True
-                return False
+                if is_video(file_path):
+                    return self._video_nsfw_score(file_path, stop_above)
+                return detections_score(self.nude_detector.detect(file_path))
             except Exception as e:
                 logging.error(f"Error checking NSFW with NudeNet for {file_path}: {e}")
         
         # Fallback: Simple skin detection (basic heuristic)
-        return self._simple_skin_detection(file_path)
+        return 1.0 if self._simple_skin_detection(file_path) else 0.0
+
+    def _video_nsfw_score(self, file_path, stop_above):
+        best = 0.0
+        for frame in keyframes(file_path, VIDEO_KEYFRAMES):
+            best = max(best, detections_score(self.nude_detector.detect(frame)))
+            if best > stop_above:
+                break
+        return best
 
     def _simple_skin_detection(self, file_path):
         """
         Simple skin tone detection as a basic NSFW heuristic.
-        Returns True if >30% of image is skin-colored.
+        Returns True if >30% of image is skin-colored; videos are checked on a few sampled frames.
         NOTE: This is a basic approximation and much less accurate than AI models.
         """
+        if not SKIN_DETECTION_AVAILABLE:
+            # No opencv, cannot do detection
+            return False
         try:
-            # Try to use opencv if available
-            if 'cv2' in globals():
-                import cv2
-                img = cv2.imread(file_path)
-                if img is None:
-                    return False
-                
-                # Convert to HSV for better skin detection
-                hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-                
-                # Skin tone range in HSV
-                lower_skin = np.array([0, 20, 70], dtype=np.uint8)
-                upper_skin = np.array([20, 255, 255], dtype=np.uint8)
-                
-                # Create mask
-                mask = cv2.inRange(hsv, lower_skin, upper_skin)
-                skin_pixels = np.sum(mask > 0)
-                total_pixels = img.shape[0] * img.shape[1]
-                
-                skin_percentage = skin_pixels / total_pixels
-                
-                # If more than 30% skin, flag as potential NSFW
-                return skin_percentage > 0.30
-            else:
-                # No opencv, cannot do detection
-                return False
+            return skin_score(file_path) > 0.5
         except Exception as e:
             logging.error(f"Error in skin detection for {file_path}: {e}")
             return False
 
-    def scan_faces(self, folder_path):
+    def scan_faces(self, folder_path, cache=None):
         """
         Scans a folder for faces and returns:
         - face_data: {file_path: [encodings]}
         - family_photos: [file_paths with >3 faces]
+        cache: optional AICache; encodings are looked up by content hash, so
+        unchanged, renamed and duplicated images are only scanned once.
+        The remaining images are encoded on a FacePipeline process pool.
         """
         if not FACE_RECOGNITION_AVAILABLE:
             return {}, []
 
         face_data = {}
         family_photos = []
-        
+
+        paths = []
         for root, _, files in os.walk(folder_path):
             for file in files:
                 if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    path = os.path.join(root, file)
-                    try:
-                        image = face_recognition.load_image_file(path)
-                        encodings = face_recognition.face_encodings(image)
-                        
-                        if len(encodings) > 3:
-                            # Family photo (>3 faces)
-                            family_photos.append(path)
-                        elif encodings:
-                            # 1-3 faces, save for clustering
-                            face_data[path] = encodings
-                    except Exception as e:
-                        logging.error(f"Error scanning faces in {path}: {e}")
+                    paths.append(os.path.join(root, file))
+
+        hashes = cache.content_hashes(paths) if cache else {}
+        known = cache.get_faces(hashes.values(), FACE_MODEL) if cache else {}
+        logging.info(f"Face scan: {len(paths)} images, {len(known)} cached results")
+        new_results = []
+
+        def classify(path, encodings):
+            if len(encodings) > 3:
+                # Family photo (>3 faces)
+                family_photos.append(path)
+            elif encodings:
+                # 1-3 faces, save for clustering
+                face_data[path] = encodings
+
+        # Identical images are encoded once and share the result
+        todo = []
+        waiting = {}
+        for path in paths:
+            content_hash = hashes.get(path)
+            if content_hash in known:
+                classify(path, known[content_hash])
+            elif content_hash in waiting:
+                waiting[content_hash].append(path)
+            else:
+                if content_hash:
+                    waiting[content_hash] = []
+                todo.append(path)
+
+        for path, encodings, error in FacePipeline().iter_encodings(todo):
+            if error:
+                logging.error(f"Error scanning faces in {path}: {error}")
+                continue
+            content_hash = hashes.get(path)
+            for same in [path] + waiting.pop(content_hash, []):
+                classify(same, encodings)
+            if content_hash:
+                new_results.append((content_hash, encodings))
+                if len(new_results) >= 500:
+                    cache.put_faces(new_results, FACE_MODEL)
+                    new_results = []
+
+        if new_results:
+            cache.put_faces(new_results, FACE_MODEL)
         
         return face_data, family_photos
 
-    def group_faces(self, face_data):
+    def group_faces(self, face_data, person_index=None, hashes=None):
         """
         Groups faces using clustering.
         Returns a dictionary: {label_id: [list_of_file_paths]}
+        With a PersonIndex and the content hashes of the paths, only images
+        new to the index are clustered and labels stay the same across runs.
         """
-        if not FACE_RECOGNITION_AVAILABLE or not face_data:
+        if not FACE_RECOGNITION_AVAILABLE or not CLUSTERING_AVAILABLE or not face_data:
             return {}
 
+        if person_index is not None and hashes is not None:
+            person_index.update({hashes[path]: encodings for path, encodings in face_data.items() if path in hashes})
+            groups = {}
+            for path in face_data:
+                for label in person_index.labels_of(hashes.get(path)):
+                    groups.setdefault(label, set()).add(path)
+            return groups
+
         # Flatten all encodings with their source paths
         all_encodings = []
         encoding_to_path = []  # Track which encoding came from which file
@@ -140,14 +219,14 @@ class AIOrganizer:
         if not all_encodings:
             return {}
 
-        # Cluster with tolerance for face similarity
-        clt = DBSCAN(metric="euclidean", n_jobs=-1, eps=0.5, min_samples=2)
-        clt.fit(all_encodings)
+        # Cluster with tolerance for face similarity; a ball tree keeps this far below all-pairs cost
+        index = FaceClusterIndex(eps=0.5, min_samples=2)
+        labels = index.add(encoding_matrix(all_encodings))
 
         # Group by label
         groups = {}
-        for label, path in zip(clt.labels_, encoding_to_path):
-            if label == -1:
+        for label, path in zip(labels.tolist(), encoding_to_path):
+            if label == NOISE:
                 continue  # Noise/unknown faces
             if label not in groups:
                 groups[label] = set()
@@ -157,15 +236,4 @@ class AIOrganizer:
     
     def get_unique_filename(self, dest_dir, filename):
         """Handle filename collisions by appending a counter."""
-        dest_path = os.path.join(dest_dir, filename)
-        if not os.path.exists(dest_path):
-            return filename
-        
-        base, ext = os.path.splitext(filename)
-        counter = 1
-        while True:
-            new_filename = f"{base}_{counter}{ext}"
-            new_path = os.path.join(dest_dir, new_filename)
-            if not os.path.exists(new_path):
-                return new_filename
-            counter += 1
+        return self.name_allocator.allocate(dest_dir, filename)
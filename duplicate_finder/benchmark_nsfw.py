@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import argparse
+from ai_organizer import AIOrganizer
+from nsfw_pipeline import NSFWPipeline, NSFW_IMAGE_EXTENSIONS
+
+
+def collect_images(folder, limit):
+    paths = []
+    for root, _, files in os.walk(folder):
+        for file in files:
+            if file.lower().endswith(NSFW_IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, file))
+                if len(paths) >= limit:
+                    return paths
+    return paths
+
+
+def bench_serial(organizer, paths):
+    start = time.perf_counter()
+    flagged = sum(1 for path in paths if organizer.is_nsfw(path))
+    return time.perf_counter() - start, flagged
+
+
+def bench_pipeline(pipeline, paths):
+    flagged = 0
+
+    def on_result(path, unsafe, error):
+        nonlocal flagged
+        flagged += bool(unsafe)
+
+    start = time.perf_counter()
+    pipeline.classify(paths, on_result)
+    return time.perf_counter() - start, flagged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare serial is_nsfw calls with the batched NSFW pipeline")
+    parser.add_argument("folder")
+    parser.add_argument("--limit", type=int, default=500, help="Number of images to classify")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None, help="Decode workers (default: half the cores)")
+    args = parser.parse_args(argv)
+
+    paths = collect_images(args.folder, args.limit)
+    if not paths:
+        print("No images found.", file=sys.stderr)
+        return 1
+
+    organizer = AIOrganizer()
+    pipeline = NSFWPipeline(organizer, batch_size=args.batch_size, decode_workers=args.workers)
+    print(f"{len(paths)} images, batched inference: {'yes' if pipeline.batched else 'no (per file fallback)'}, "
+          f"{pipeline.decode_workers} decode workers, batch size {pipeline.batch_size}")
+
+    # Warm up the model and the page cache so neither run pays for it alone
+    bench_pipeline(pipeline, paths[:args.batch_size])
+
+    serial_time, serial_flagged = bench_serial(organizer, paths)
+    pipeline_time, pipeline_flagged = bench_pipeline(pipeline, paths)
+    print(f"serial:   {len(paths) / serial_time:8.1f} images/s ({serial_time:.2f}s, {serial_flagged} flagged)")
+    print(f"pipeline: {len(paths) / pipeline_time:8.1f} images/s ({pipeline_time:.2f}s, {pipeline_flagged} flagged)")
+    print(f"speedup:  {serial_time / pipeline_time:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# What main.py imports before the window appears
+DEFAULT_MODULES = ["ui"]
+
+
+def time_import(modules):
+    """Wall time of a fresh interpreter importing modules, in seconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {', '.join(modules)}"], check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure application startup as the time to import its modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    baseline = min(time_import(["sys"]) for _ in range(args.runs))
+    # The first run warms the OS file cache
+    time_import(args.modules)
+    timings = sorted(time_import(args.modules) for _ in range(args.runs))
+    print(f"Interpreter startup: {baseline * 1000:.0f} ms")
+    print(f"import {', '.join(args.modules)}: best {timings[0] * 1000:.0f} ms, "
+          f"median {timings[len(timings) // 2] * 1000:.0f} ms over {args.runs} runs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import sys
+import argparse
+from scanner import DuplicateScanner
+from database import HistoryManager
+from keep_policy import KeepPolicyEngine, KEEP_POLICIES
+from dedup import Deduplicator, LINK_MODES
+from consolidator import MediaConsolidator
+from journal import MoveJournal
+from organize_layouts import OrganizeLayout, ORGANIZE_LAYOUTS
+from metadata_extractor import MetadataCache
+import file_ops
+
+
+def cmd_scan(args):
+    if (args.delete or args.link) and not args.keep:
+        print("Error: --delete and --link require --keep", file=sys.stderr)
+        return 2
+    if args.delete and args.link:
+        print("Error: use either --delete or --link", file=sys.stderr)
+        return 2
+
+    scanner = DuplicateScanner()
+    duplicates = scanner.scan_directory(args.path)
+    print(f"Found {len(duplicates)} groups of duplicates.")
+    if not args.keep:
+        for group in duplicates:
+            print(f"{group['hash']} ({group['size']} bytes)")
+            for path in group['files']:
+                print(f"  {path}")
+        return 0
+
+    try:
+        engine = KeepPolicyEngine(args.keep)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    plan = engine.plan(duplicates)
+    for path, _ in plan.delete:
+        print(f"DELETE {path}")
+    print(plan.summary())
+
+    if args.delete:
+        deleted, freed, errors = file_ops.delete_files(plan.delete)
+        HistoryManager(args.history_db).log_cleanup(deleted, freed)
+        print(f"Deleted {len(deleted)} files ({freed / (1024 * 1024):.2f} MB recovered), {len(errors)} errors.")
+    elif args.link:
+        replaced, freed, errors = Deduplicator(args.link).run(plan.pairs)
+        HistoryManager(args.history_db).log_replacements(replaced, args.link)
+        print(f"Replaced {len(replaced)} files with {args.link}s ({freed / (1024 * 1024):.2f} MB recovered), "
+              f"{len(errors)} errors.")
+    return 0
+
+
+def cmd_consolidate(args):
+    journal = MoveJournal(args.journal_db)
+    MediaConsolidator().consolidate_drive(args.path, log_callback=print, dry_run=args.dry_run, journal=journal,
+                                          skip_duplicates=not args.move_duplicates)
+    return 0
+
+
+def cmd_organize(args):
+    journal = MoveJournal(args.journal_db)
+    try:
+        layout = OrganizeLayout(args.layout)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    metadata_cache = MetadataCache(args.metadata_cache) if layout.needs_metadata else None
+    MediaConsolidator().organize_folder(args.path, log_callback=print, dry_run=args.dry_run, journal=journal,
+                                        layout=layout, metadata_cache=metadata_cache)
+    return 0
+
+
+def cmd_runs(args):
+    for run in MoveJournal(args.journal_db).get_runs():
+        print(f"#{run['id']} {run['created']} {run['kind']:<11} {run['status']:<9} {run['root']}")
+    return 0
+
+
+def cmd_resume(args):
+    MediaConsolidator().resume_run(MoveJournal(args.journal_db), args.run_id, log_callback=print)
+    return 0
+
+
+def cmd_undo(args):
+    MediaConsolidator().undo_run(MoveJournal(args.journal_db), args.run_id, log_callback=print)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Duplicate File Finder command line")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan = subparsers.add_parser("scan", help="Find duplicates and optionally resolve them with a keep policy")
+    scan.add_argument("path")
+    scan.add_argument("--keep", help="Comma separated keep policies, e.g. 'prefer_path:/photos,oldest'. "
+                                     f"Available: {', '.join(sorted(KEEP_POLICIES))}")
+    scan.add_argument("--delete", action="store_true", help="Delete the files the keep policy does not keep")
+    scan.add_argument("--link", choices=LINK_MODES,
+                      help="Replace the files the keep policy does not keep with links to the kept copy")
+    scan.add_argument("--history-db", default="cleanup_history.db")
+    scan.set_defaults(func=cmd_scan)
+
+    for name, func, help_text in (("consolidate", cmd_consolidate, "Move media into <path>/ConsolidatedMedia"),
+                                  ("organize", cmd_organize, "Flatten a folder into Photos/Videos")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("path")
+        sub.add_argument("--dry-run", action="store_true", help="Only plan; the plan is saved and can be resumed")
+        sub.add_argument("--journal-db", default="move_journal.db")
+        sub.set_defaults(func=func)
+        if name == "consolidate":
+            sub.add_argument("--move-duplicates", action="store_true",
+                             help="Also move files whose content is already consolidated (renamed name_1.ext)")
+        else:
+            sub.add_argument("--layout", default="type",
+                             help="Folder layout, components joined by '/', e.g. 'type/date'. "
+                                  f"Available: {', '.join(sorted(ORGANIZE_LAYOUTS))}")
+            sub.add_argument("--metadata-cache", default="metadata_cache.db")
+
+    runs = subparsers.add_parser("runs", help="List journaled consolidate/organize runs")
+    runs.add_argument("--journal-db", default="move_journal.db")
+    runs.set_defaults(func=cmd_runs)
+
+    for name, func, help_text in (("resume", cmd_resume, "Execute the remaining moves of a planned or interrupted run"),
+                                  ("undo", cmd_undo, "Move the files of a run back to where they came from")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("run_id", type=int)
+        sub.add_argument("--journal-db", default="move_journal.db")
+        sub.set_defaults(func=func)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
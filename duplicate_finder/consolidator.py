@@ -2,11 +2,22 @@ import os
 import shutil
 import logging
 from pathlib import Path
+from move_engine import MoveEngine, MoveEntry
+from name_allocator import UniqueNameAllocator
+from journal import JournalCheckpoint
+from content_index import ContentIndex
+from empty_dirs import EmptyDirectoryTracker
+from organize_layouts import OrganizeLayout
+from metadata_extractor import MetadataExtractor
+from media_inventory import MediaInventory
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class MediaConsolidator:
+    # Dry runs log at most this many planned moves; the full plan is in the journal
+    DRY_RUN_LOG_LIMIT = 1000
+
     def __init__(self):
         self.media_extensions = {
             '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp',  # Images
@@ -17,37 +28,42 @@ class MediaConsolidator:
             'ProgramData', 'AppData', '$RECYCLE.BIN', 'System Volume Information',
             'ConsolidatedMedia' # Skip our target if it exists
         }
+        self.name_allocator = UniqueNameAllocator()
 
     def is_media_file(self, filename):
         return os.path.splitext(filename)[1].lower() in self.media_extensions
 
+    def normalize_root(self, path):
+        """Absolute path, with the long-path prefix on Windows."""
+        path = os.path.abspath(path)
+        # Handle long paths on Windows
+        if os.name == 'nt' and not path.startswith('\\\\?\\'):
+            path = f"\\\\?\\{path}"
+        return path
+
     def get_unique_filename(self, directory, filename):
         """
         Generates a unique filename if the target already exists.
-        Appends _1, _2, etc.
+        Appends _1, _2, etc. The name is reserved, so later calls never return it again.
         """
-        name, ext = os.path.splitext(filename)
-        counter = 1
-        new_filename = filename
-        while os.path.exists(os.path.join(directory, new_filename)):
-            new_filename = f"{name}_{counter}{ext}"
-            counter += 1
-        return new_filename
+        return self.name_allocator.allocate(directory, filename)
 
-    def consolidate_drive(self, drive_path, progress_callback=None, log_callback=None):
+    def consolidate_drive(self, drive_path, progress_callback=None, log_callback=None, max_workers=4,
+                          dry_run=False, journal=None, skip_duplicates=True, inventory=None):
         """
-        Scans the drive and moves media files to [Drive]:\ConsolidatedMedia.
+        Scans the drive and moves media files to [Drive]:\\ConsolidatedMedia.
         Preserves immediate parent folder name.
+        All moves are planned first and then executed by the MoveEngine.
+        skip_duplicates: leave files in place when identical content is already in
+        ConsolidatedMedia or already planned to move there.
+        dry_run: only build and report the plan (saved as a 'planned' run if a journal is given).
+        journal: optional MoveJournal; completed moves are checked off so the run can be resumed or undone.
+        inventory: a MediaInventory of drive_path shared with other stages; by default the drive is walked here.
         """
-        drive_path = os.path.abspath(drive_path)
-        
-        # Handle long paths on Windows
-        if os.name == 'nt' and not drive_path.startswith('\\\\?\\'):
-            drive_path = f"\\\\?\\{drive_path}"
-            
+        drive_path = self.normalize_root(drive_path)
         base_target = os.path.join(drive_path, "ConsolidatedMedia")
         
-        if not os.path.exists(base_target):
+        if not dry_run and not os.path.exists(base_target):
             try:
                 os.makedirs(base_target)
                 if log_callback:
@@ -58,65 +74,30 @@ class MediaConsolidator:
                     log_callback(f"Error: Failed to create target directory {base_target}: {e}")
                 return
 
-        files_moved = 0
-        bytes_moved = 0
-        
         logging.info(f"Starting consolidation for {drive_path}")
         if log_callback:
             log_callback(f"Scanning {drive_path}...")
 
-        # Walk the directory tree
-        for root, dirs, files in os.walk(drive_path):
-            # Skip hidden/system directories and exclusions
-            dirs[:] = [d for d in dirs if d not in self.default_exclusions and not d.startswith('.')]
-            
-            # Check if we are in the target directory itself
-            if os.path.commonpath([root, base_target]) == base_target:
-                continue
+        plan, skipped = self.plan_consolidation(drive_path, base_target, log_callback, skip_duplicates,
+                                                inventory)
+        if skipped:
+            skipped_bytes = sum(size for _, _, size in skipped)
+            msg = f"Skipping {len(skipped)} duplicate files ({skipped_bytes / (1024*1024):.2f} MB) already in {base_target}."
+            logging.info(msg)
+            if log_callback:
+                log_callback(msg)
+        if dry_run:
+            return self.report_dry_run("consolidate", drive_path, plan, journal, log_callback, skipped)
 
-            for file in files:
-                if self.is_media_file(file):
-                    source_path = os.path.join(root, file)
-                    
-                    # Get immediate parent folder name
-                    parent_folder = os.path.basename(root)
-                    
-                    # If root is drive root
-                    if parent_folder == os.path.basename(drive_path) or not parent_folder:
-                        parent_folder = "Root_Files"
-
-                    target_dir = os.path.join(base_target, parent_folder)
-                    
-                    try:
-                        if not os.path.exists(target_dir):
-                            os.makedirs(target_dir)
-                        
-                        target_filename = self.get_unique_filename(target_dir, file)
-                        target_path = os.path.join(target_dir, target_filename)
-                        
-                        # Get size for logging
-                        size = os.path.getsize(source_path)
-                        
-                        # Move the file
-                        shutil.move(source_path, target_path)
-                        
-                        files_moved += 1
-                        bytes_moved += size
-                        
-                        msg = f"Moved: {file} ({size / 1024:.2f} KB) -> {parent_folder}"
-                        logging.info(msg)
-                        if log_callback:
-                            log_callback(msg)
-                            
-                        if progress_callback:
-                            progress_callback(files_moved)
-                            
-                    except Exception as e:
-                        # Log the error but continue (skip the file)
-                        err_msg = f"Skipping file {file} due to error: {e}"
-                        logging.warning(err_msg)
-                        if log_callback:
-                            log_callback(err_msg)
+        if log_callback:
+            log_callback(f"Planned {len(plan)} moves. Moving...")
+        run_id = journal.create_run("consolidate", drive_path, plan, status="running") if journal else None
+        if journal and skipped:
+            journal.record_skipped(run_id, skipped)
+        files_moved, bytes_moved = self.execute_plan(list(enumerate(plan)), "Moved", progress_callback, log_callback,
+                                                     max_workers, journal, run_id)
+        if journal:
+            journal.set_status(run_id, "completed")
 
         summary = f"Consolidation Complete. Moved {files_moved} files ({bytes_moved / (1024*1024):.2f} MB)."
         logging.info(summary)
@@ -125,74 +106,308 @@ class MediaConsolidator:
         
         return files_moved, bytes_moved
 
-    def organize_folder(self, target_folder, log_callback=None):
+    def execute_plan(self, seq_entries, verb="Moved", progress_callback=None, log_callback=None, max_workers=4,
+                     journal=None, run_id=None, moved_callback=None):
+        """
+        Executes (seq, MoveEntry) pairs with the MoveEngine, logging each result
+        and checking completed entries off in the journal in batches.
+        moved_callback(entry) is called for every successful move.
+        Returns (files_moved, bytes_moved).
+        """
+        checkpoint = JournalCheckpoint(journal, run_id, seq_entries) if journal else None
+        files_moved = 0
+
+        def on_result(entry, error):
+            nonlocal files_moved
+            file = os.path.basename(entry.source)
+            if error is None:
+                files_moved += 1
+                if checkpoint:
+                    checkpoint.record(entry)
+                if moved_callback:
+                    moved_callback(entry)
+                parent_folder = os.path.basename(os.path.dirname(entry.target))
+                msg = f"{verb}: {file} ({entry.size / 1024:.2f} KB) -> {parent_folder}"
+                logging.info(msg)
+                if log_callback:
+                    log_callback(msg)
+                if progress_callback:
+                    progress_callback(files_moved)
+            else:
+                # Log the error but continue (skip the file)
+                err_msg = f"Skipping file {file} due to error: {error}"
+                logging.warning(err_msg)
+                if log_callback:
+                    log_callback(err_msg)
+
+        engine = MoveEngine(max_workers=max_workers)
+        try:
+            files_moved, bytes_moved, _ = engine.execute([entry for _, entry in seq_entries], on_result)
+        finally:
+            if checkpoint:
+                checkpoint.flush()
+        return files_moved, bytes_moved
+
+    def report_dry_run(self, kind, root, plan, journal=None, log_callback=None, skipped=None):
+        """Logs a plan without executing it. Returns the plan."""
+        total_bytes = sum(entry.size for entry in plan)
+        if log_callback:
+            for entry in plan[:self.DRY_RUN_LOG_LIMIT]:
+                log_callback(f"Would move: {entry.source} -> {entry.target}")
+            if len(plan) > self.DRY_RUN_LOG_LIMIT:
+                log_callback(f"... and {len(plan) - self.DRY_RUN_LOG_LIMIT} more.")
+        summary = f"Dry run: {len(plan)} files ({total_bytes / (1024*1024):.2f} MB) would be moved."
+        if journal:
+            run_id = journal.create_run(kind, root, plan)
+            if skipped:
+                journal.record_skipped(run_id, skipped)
+            summary += f" Plan saved as run #{run_id}; resume it to execute."
+        logging.info(summary)
+        if log_callback:
+            log_callback(summary)
+        return plan
+
+    def resume_run(self, journal, run_id, progress_callback=None, log_callback=None, max_workers=4):
+        """
+        Executes the entries of a planned or interrupted run that are not checked off yet.
+        Entries whose move already happened (source gone, target present) are checked off first.
+        """
+        run = journal.get_run(run_id)
+        pending = journal.entries(run_id, done=False)
+        already_moved = [seq for seq, e in pending if not os.path.exists(e.source) and os.path.exists(e.target)]
+        if already_moved:
+            journal.mark_done(run_id, already_moved)
+            already_moved = set(already_moved)
+            pending = [(seq, e) for seq, e in pending if seq not in already_moved]
+
+        if log_callback:
+            log_callback(f"Resuming run #{run_id} ({run['kind']}): {len(pending)} moves remaining.")
+        journal.set_status(run_id, "running")
+        verb = "Organized" if run['kind'] == "organize" else "Moved"
+        files_moved, bytes_moved = self.execute_plan(pending, verb, progress_callback, log_callback,
+                                                     max_workers, journal, run_id)
+        if run['kind'] == "organize":
+            self.cleanup_organized(run['root'], log_callback)
+        journal.set_status(run_id, "completed")
+
+        if log_callback:
+            log_callback(f"Run #{run_id} complete. Moved {files_moved} files ({bytes_moved / (1024*1024):.2f} MB).")
+        return files_moved, bytes_moved
+
+    def undo_run(self, journal, run_id, log_callback=None, max_workers=4):
+        """Moves every completed entry of a run back to its source, newest first."""
+        done = journal.entries(run_id, done=True)
+        reverse = [(seq, MoveEntry(e.target, e.source, e.size)) for seq, e in reversed(done)]
+        if log_callback:
+            log_callback(f"Undoing run #{run_id}: moving {len(reverse)} files back.")
+
+        seq_by_source = {entry.source: seq for seq, entry in reverse}
+        restored = []
+
+        def on_result(entry, error):
+            if error is None:
+                restored.append(seq_by_source[entry.source])
+            elif log_callback:
+                log_callback(f"Could not restore {entry.target}: {error}")
+
+        files_moved, bytes_moved, errors = MoveEngine(max_workers=max_workers).execute(
+            [entry for _, entry in reverse], on_result)
+        journal.mark_done(run_id, restored, done=False)
+        journal.set_status(run_id, "undone" if not errors else "running")
+
+        if log_callback:
+            log_callback(f"Undo complete. Restored {files_moved} files, {len(errors)} errors.")
+        return files_moved, bytes_moved
+
+    def plan_consolidation(self, drive_path, base_target, log_callback=None, skip_duplicates=True, inventory=None):
+        """
+        Walks the drive once and returns (plan, skipped): the list of MoveEntry
+        items and, with skip_duplicates, (source, duplicate_of, size) for files
+        whose content is already at the target or already planned.
+        Sizes come from the directory scan, and target names are reserved by
+        the name allocator so files planned into the same folder never collide.
+        With a shared inventory, excluded folders are filtered from its table.
+        """
+        plan = []
+        skipped = []
+        content_index = None
+        if skip_duplicates:
+            content_index = ContentIndex()
+            if os.path.isdir(base_target):
+                content_index.add_tree(base_target, self.is_media_file)
+
+        def skip_dir(path, name):
+            # Skip the target directory itself and hidden/system directories and exclusions
+            return path == base_target or name in self.default_exclusions or name.startswith('.')
+
+        if inventory is None:
+            inventory = MediaInventory(drive_path, skip_dir)
+
+        for entry in inventory.stream(skip_dir=skip_dir):
+            if not self.is_media_file(entry.name):
+                continue
+            root = os.path.dirname(entry.path)
+
+            # Get immediate parent folder name
+            parent_folder = os.path.basename(root)
+            
+            # If root is drive root
+            if parent_folder == os.path.basename(drive_path) or not parent_folder:
+                parent_folder = "Root_Files"
+
+            target_dir = os.path.join(base_target, parent_folder)
+            source_path = entry.path
+            if content_index is not None:
+                duplicate_of = content_index.find_duplicate(source_path, entry.size)
+                if duplicate_of:
+                    skipped.append((source_path, duplicate_of, entry.size))
+                    continue
+                content_index.add(source_path, entry.size)
+            target_filename = self.get_unique_filename(target_dir, entry.name)
+            plan.append(MoveEntry(source_path, os.path.join(target_dir, target_filename), entry.size))
+
+        return plan, skipped
+
+    def organize_folder(self, target_folder, log_callback=None, dry_run=False, journal=None, layout="type",
+                        metadata_cache=None, inventory=None):
         """
         Organizes files in the target folder into Photos and Videos subfolders.
         Flattens the structure.
+        layout: an OrganizeLayout spec, e.g. "type" (Photos/Videos), "date"
+        (YYYY/MM by capture time) or "type/date". metadata_cache is an optional
+        MetadataCache so unchanged files are not re-parsed by date/camera layouts.
+        The folder is walked once: the same pass plans the moves, collects junk
+        files (._*) and counts what each folder holds, so only folders that the
+        run actually empties are removed afterwards.
+        dry_run, journal and inventory behave as in consolidate_drive.
         """
-        target_folder = os.path.abspath(target_folder)
-        if os.name == 'nt' and not target_folder.startswith('\\\\?\\'):
-            target_folder = f"\\\\?\\{target_folder}"
+        target_folder = self.normalize_root(target_folder)
 
         logging.info(f"Starting organization for {target_folder}")
         if log_callback:
             log_callback(f"Organizing {target_folder}...")
 
-        photos_dir = os.path.join(target_folder, "Photos")
-        videos_dir = os.path.join(target_folder, "Videos")
-
-        for d in [photos_dir, videos_dir]:
-            if not os.path.exists(d):
-                os.makedirs(d)
+        plan, junk, tracker = self.plan_organize(target_folder, layout, metadata_cache, log_callback, inventory)
+        if dry_run:
+            if log_callback:
+                log_callback(f"{len(junk)} junk files (._*) and the folders left empty would also be removed.")
+            return self.report_dry_run("organize", target_folder, plan, journal, log_callback)
 
-        files_moved = 0
+        run_id = journal.create_run("organize", target_folder, plan, status="running") if journal else None
+        files_moved, _ = self.execute_plan(list(enumerate(plan)), "Organized", log_callback=log_callback,
+                                           journal=journal, run_id=run_id,
+                                           moved_callback=lambda entry: tracker.release(entry.source))
+        self.remove_planned_junk(junk, tracker, log_callback)
+        removed_dirs = tracker.remove_empty()
+        logging.info(f"Removed {removed_dirs} empty folders from {target_folder}")
+        if journal:
+            journal.set_status(run_id, "completed")
         
-        # Walk and move
-        for root, dirs, files in os.walk(target_folder):
+        if log_callback:
+            log_callback(f"Organization Complete. Organized {files_moved} files.")
+
+    def plan_organize(self, target_folder, layout="type", metadata_cache=None, log_callback=None, inventory=None):
+        """
+        Walks the folder once and returns (plan, junk, tracker): the MoveEntry
+        list into the layout's folders, the junk files (._*) found, and an
+        EmptyDirectoryTracker holding the entry count of every walked folder.
+        Files already in their destination folder are left out of the plan.
+        """
+        if isinstance(layout, str):
+            layout = OrganizeLayout(layout)
+        fixed_roots = layout.fixed_roots
+        media = []
+        junk = []
+        tracker = EmptyDirectoryTracker(target_folder)
+
+        def skip_dir(path, name):
             # Skip the destination folders themselves to avoid loops if they are inside target
-            if os.path.abspath(root) == os.path.abspath(photos_dir) or os.path.abspath(root) == os.path.abspath(videos_dir):
+            return os.path.dirname(path) == target_folder and name in fixed_roots
+
+        if inventory is None:
+            inventory = MediaInventory(target_folder, skip_dir)
+
+        for entry in inventory.stream(skip_dir=skip_dir):
+            if entry.kind == "junk":
+                junk.append(entry.path)
+            elif self.is_media_file(entry.name):
+                media.append((entry.path, entry.size, entry.mtime))
+        for directory, entry_count in inventory.directories(skip_dir).items():
+            tracker.add_directory(directory, entry_count)
+
+        infos = {}
+        if layout.needs_metadata and media:
+            if log_callback:
+                log_callback(f"Reading capture metadata of {len(media)} files...")
+            infos = MetadataExtractor(metadata_cache).extract(media)
+
+        plan = []
+        for source_path, size, mtime in media:
+            # Determine type
+            ext = os.path.splitext(source_path)[1].lower()
+            kind = "Photos" if ext in {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'} else "Videos"
+            dest_dir = layout.target_dir(target_folder, kind, infos.get(source_path), mtime)
+            if dest_dir == os.path.dirname(source_path):
                 continue
-                
+            target_filename = self.get_unique_filename(dest_dir, os.path.basename(source_path))
+            target_path = os.path.join(dest_dir, target_filename)
+            # The destination may be a walked folder (e.g. an existing YYYY/MM)
+            tracker.claim(target_path)
+            plan.append(MoveEntry(source_path, target_path, size))
+
+        return plan, junk, tracker
+
+    def remove_planned_junk(self, junk, tracker=None, log_callback=None):
+        """Removes the junk files collected while planning. Returns the count."""
+        count = 0
+        for file_path in junk:
+            try:
+                os.remove(file_path)
+                count += 1
+                if tracker:
+                    tracker.release(file_path)
+                logging.info(f"Removed junk file: {file_path}")
+            except OSError as e:
+                logging.error(f"Failed to remove {file_path}: {e}")
+
+        msg = f"Cleanup finished. Removed {count} junk files."
+        logging.info(msg)
+        if log_callback:
+            log_callback(msg)
+        return count
+
+    def cleanup_organized(self, target_folder, log_callback=None):
+        """
+        Removes junk files and then the directories left empty, in one
+        bottom-up walk. Used after resuming a run, when the planning walk's
+        counts are not available.
+        """
+        removed_dirs = set()
+        junk_count = 0
+        for root, dirs, files in os.walk(target_folder, topdown=False):
+            remaining = len(files)
             for file in files:
-                if self.is_media_file(file):
-                    source_path = os.path.join(root, file)
-                    
-                    # Determine type
-                    ext = os.path.splitext(file)[1].lower()
-                    if ext in {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp'}:
-                        dest_dir = photos_dir
-                        type_name = "Photos"
-                    else:
-                        dest_dir = videos_dir
-                        type_name = "Videos"
-                    
+                if file.startswith("._"):
+                    file_path = os.path.join(root, file)
                     try:
-                        target_filename = self.get_unique_filename(dest_dir, file)
-                        target_path = os.path.join(dest_dir, target_filename)
-                        
-                        shutil.move(source_path, target_path)
-                        files_moved += 1
-                        
-                        if log_callback:
-                            log_callback(f"Organized: {file} -> {type_name}\\{target_filename}")
-                            
-                    except Exception as e:
-                        if log_callback:
-                            log_callback(f"Error organizing {file}: {e}")
-
-        # Cleanup empty directories
-        for root, dirs, files in os.walk(target_folder, topdown=False):
-            for name in dirs:
+                        os.remove(file_path)
+                        junk_count += 1
+                        remaining -= 1
+                    except OSError as e:
+                        logging.error(f"Failed to remove {file_path}: {e}")
+            if root == target_folder or remaining:
+                continue
+            if all(os.path.join(root, d) in removed_dirs for d in dirs):
                 try:
-                    os.rmdir(os.path.join(root, name))
+                    os.rmdir(root)
+                    removed_dirs.add(root)
                 except OSError:
-                    pass # Directory not empty
+                    pass
 
-        # Remove junk files
-        self.remove_junk_files(target_folder, log_callback)
-        
+        msg = f"Cleanup finished. Removed {junk_count} junk files and {len(removed_dirs)} empty folders."
+        logging.info(msg)
         if log_callback:
-            log_callback(f"Organization Complete. Organized {files_moved} files.")
+            log_callback(msg)
 
     def remove_junk_files(self, target_root, log_callback=None):
         """
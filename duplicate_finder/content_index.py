@@ -0,0 +1,73 @@
+import os
+import logging
+from collections import defaultdict
+from scanner import DuplicateScanner
+
+
+class _IndexedFile:
+    __slots__ = ('path', 'partial', 'full')
+
+    def __init__(self, path):
+        self.path = path
+        self.partial = None
+        self.full = None
+
+
+class ContentIndex:
+    """
+    Size-first index of file contents, used to recognise files that already
+    exist elsewhere. Hashes are computed lazily with DuplicateScanner's staged
+    hashing: only files sharing a size are partial-hashed, and only matching
+    partial hashes are fully hashed.
+    """
+    def __init__(self, scanner=None):
+        self.scanner = scanner or DuplicateScanner()
+        self._by_size = defaultdict(list)
+
+    def __len__(self):
+        return sum(len(files) for files in self._by_size.values())
+
+    def add(self, path, size):
+        self._by_size[size].append(_IndexedFile(path))
+
+    def add_tree(self, root, file_filter=None):
+        """Indexes every file under root (sizes only; nothing is read)."""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False) and (file_filter is None or file_filter(entry.name)):
+                                self.add(entry.path, entry.stat(follow_symlinks=False).st_size)
+                        except OSError as e:
+                            logging.warning(f"Could not access {entry.path}: {e}")
+            except OSError as e:
+                logging.warning(f"Could not list {directory}: {e}")
+
+    def find_duplicate(self, path, size):
+        """Returns the path of an indexed file byte-identical to path, or None."""
+        candidates = self._by_size.get(size)
+        if not candidates:
+            return None
+
+        probe = _IndexedFile(path)
+        probe.partial = self.scanner.get_partial_hash(path)
+        if probe.partial is None:
+            return None
+
+        for candidate in candidates:
+            if candidate.partial is None:
+                candidate.partial = self.scanner.get_partial_hash(candidate.path)
+            if candidate.partial != probe.partial:
+                continue
+            if probe.full is None:
+                probe.full = self.scanner.get_full_hash(path)
+            if candidate.full is None:
+                candidate.full = self.scanner.get_full_hash(candidate.path)
+            if probe.full is not None and candidate.full == probe.full:
+                return candidate.path
+        return None
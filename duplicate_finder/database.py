@@ -19,6 +19,16 @@ class HistoryManager:
                 space_recovered INTEGER
             )
         ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS replacements (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                mode TEXT,
+                source TEXT,
+                target TEXT,
+                space_recovered INTEGER
+            )
+        ''')
         conn.commit()
         conn.close()
 
@@ -56,3 +66,31 @@ class HistoryManager:
                 'space_recovered': row[2]
             })
         return history
+
+    def log_replacements(self, replacements, mode):
+        """
+        Logs files that were replaced by links to a kept copy.
+        replacements: list of (source, target, bytes) tuples
+        mode: 'hardlink' or 'reflink'
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        timestamp = datetime.now().isoformat()
+        cursor.executemany('INSERT INTO replacements (timestamp, mode, source, target, space_recovered) VALUES (?, ?, ?, ?, ?)',
+                           [(timestamp, mode, source, target, size) for source, target, size in replacements])
+        conn.commit()
+        conn.close()
+
+    def get_replacement_history(self):
+        """
+        Returns one record per link run: timestamp, mode, file count and space recovered.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT timestamp, mode, COUNT(*), SUM(space_recovered) FROM replacements '
+                       'GROUP BY timestamp, mode ORDER BY timestamp DESC')
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [{'timestamp': row[0], 'mode': row[1], 'files_replaced': row[2], 'space_recovered': row[3] or 0}
+                for row in rows]
@@ -0,0 +1,108 @@
+import os
+import shutil
+import logging
+import concurrent.futures
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request number of FICLONE (_IOW(0x94, 9, int)) on Linux
+FICLONE = 0x40049409
+
+LINK_MODES = ('hardlink', 'reflink')
+
+
+def files_identical(path_a, path_b, chunk_size=1024 * 1024):
+    """Byte-for-byte comparison; sizes are checked first."""
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, 'rb') as fa, open(path_b, 'rb') as fb:
+        while True:
+            a = fa.read(chunk_size)
+            b = fb.read(chunk_size)
+            if a != b:
+                return False
+            if not a:
+                return True
+
+
+def reflink(source, dest):
+    """Creates dest as a copy-on-write clone of source (btrfs, XFS)."""
+    if fcntl is None:
+        raise OSError("Reflinks are not supported on this platform")
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+class Deduplicator:
+    """
+    Replaces duplicate files with links to a kept copy, so space is reclaimed
+    without removing any path. Each replacement is verified byte-for-byte,
+    built next to the target and renamed over it atomically.
+    """
+    def __init__(self, mode='hardlink', verify=True, max_workers=None):
+        if mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{mode}'. Available: {', '.join(LINK_MODES)}")
+        self.mode = mode
+        self.verify = verify
+        self.max_workers = max_workers
+
+    def replace(self, source, target):
+        """
+        Replaces target with a link to source. Returns the bytes reclaimed
+        (0 if target already shares source's inode).
+        """
+        if os.path.samefile(source, target):
+            return 0
+        size = os.path.getsize(target)
+        if self.verify and not files_identical(source, target):
+            raise ValueError(f"{target} differs from {source}")
+
+        tmp_path = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.dedup.tmp")
+        try:
+            if self.mode == 'hardlink':
+                os.link(source, tmp_path)
+            else:
+                reflink(source, tmp_path)
+                # A clone is a new inode, so keep the target's own permissions and times
+                shutil.copystat(target, tmp_path)
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return size
+
+    def run(self, pairs, progress_callback=None):
+        """
+        pairs: list of (source, target) where target becomes a link to source.
+        Returns (replaced, bytes_reclaimed, errors); replaced holds (source, target, bytes).
+        """
+        replaced = []
+        reclaimed = 0
+        errors = []
+
+        def process(pair):
+            source, target = pair
+            try:
+                return source, target, self.replace(source, target), None
+            except (OSError, ValueError) as e:
+                return source, target, 0, str(e)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for done, (source, target, size, error) in enumerate(executor.map(process, pairs), 1):
+                if error:
+                    logging.error(f"Could not {self.mode} {target} -> {source}: {error}")
+                    errors.append((target, error))
+                else:
+                    replaced.append((source, target, size))
+                    reclaimed += size
+                if progress_callback and (done % 100 == 0 or done == len(pairs)):
+                    progress_callback(done, len(pairs))
+
+        logging.info(f"Replaced {len(replaced)} files with {self.mode}s, reclaimed {reclaimed} bytes.")
+        return replaced, reclaimed, errors
@@ -0,0 +1,55 @@
+import os
+import logging
+
+
+class EmptyDirectoryTracker:
+    """
+    Counts the entries each walked directory still holds, so the directories
+    emptied by a run can be removed without walking the tree again.
+    Only directories whose count reaches zero are removed; the root never is.
+    """
+    def __init__(self, root):
+        self.root = root
+        self._remaining = {}
+
+    def __len__(self):
+        return len(self._remaining)
+
+    def add_directory(self, path, entry_count):
+        """Registers a directory below root together with the number of entries it was listed with."""
+        if path != self.root:
+            self._remaining[path] = entry_count
+
+    def claim(self, path):
+        """
+        Records that a file will be placed at path, keeping its nearest walked
+        ancestor (the parent, or the folder new parents get created in) from being removed.
+        """
+        parent = os.path.dirname(path)
+        while parent not in self._remaining:
+            if parent == self.root or os.path.dirname(parent) == parent:
+                return
+            parent = os.path.dirname(parent)
+        self._remaining[parent] += 1
+
+    def release(self, path):
+        """Records that the file or directory at path is gone from its parent."""
+        parent = os.path.dirname(path)
+        if parent in self._remaining:
+            self._remaining[parent] -= 1
+
+    def remove_empty(self):
+        """Removes emptied directories deepest first, so parents emptied by that are removed too. Returns the count."""
+        removed = 0
+        for path in sorted(self._remaining, key=lambda p: p.count(os.sep), reverse=True):
+            if self._remaining[path] > 0:
+                continue
+            try:
+                os.rmdir(path)
+            except OSError as e:
+                # Something appeared since the walk; leave it alone
+                logging.warning(f"Could not remove folder {path}: {e}")
+                continue
+            removed += 1
+            self.release(path)
+        return removed
@@ -0,0 +1,191 @@
+import logging
+from lazy_imports import lazy_import, module_available
+
+np = lazy_import("numpy")
+sparse = lazy_import("scipy.sparse")
+csgraph = lazy_import("scipy.sparse.csgraph")
+neighbors = lazy_import("sklearn.neighbors")
+CLUSTERING_AVAILABLE = module_available("numpy", "scipy", "sklearn")
+
+NOISE = -1
+
+
+def encoding_matrix(encodings):
+    """Stacks face encodings into a contiguous float32 (n, 128) matrix."""
+    if len(encodings) == 0:
+        return np.zeros((0, 128), dtype=np.float32)
+    return np.ascontiguousarray(np.asarray(encodings, dtype=np.float32).reshape(len(encodings), -1))
+
+
+def _merge_components(component, a, b):
+    """Unites the components a[i] and b[i] for every i; returns the new component per point."""
+    n = len(component)
+    graph = sparse.coo_matrix((np.ones(len(a), dtype=np.int8), (a, b)), shape=(n, n))
+    _, merged = csgraph.connected_components(graph, directed=False)
+    return merged[component]
+
+
+def cluster_dbscan(matrix, eps=0.5, min_samples=2, chunk_size=2048):
+    """
+    DBSCAN over a BallTree. Neighbourhoods are queried one chunk of points at
+    a time and folded into connected components, so memory is bounded by a
+    chunk's neighbourhoods instead of the full n x n neighbour graph.
+    Returns (labels, core), with labels numbered from 0 and NOISE for outliers.
+    """
+    n = len(matrix)
+    labels = np.full(n, NOISE, dtype=np.int64)
+    if n == 0:
+        return labels, np.zeros(0, dtype=bool)
+
+    tree = neighbors.BallTree(matrix)
+    # Like sklearn's DBSCAN, a point counts towards its own neighbourhood
+    counts = np.concatenate([tree.query_radius(matrix[i:i + chunk_size], eps, count_only=True)
+                             for i in range(0, n, chunk_size)])
+    core = counts >= min_samples
+    core_rows = np.flatnonzero(core)
+    component = np.arange(n)
+    # Border points join the cluster of a core point that reaches them
+    owner = np.full(n, -1, dtype=np.int64)
+
+    for start in range(0, len(core_rows), chunk_size):
+        rows = core_rows[start:start + chunk_size]
+        neighbourhoods = tree.query_radius(matrix[rows], eps)
+        src = np.repeat(rows, [len(hood) for hood in neighbourhoods])
+        dst = np.concatenate(neighbourhoods)
+        to_core = core[dst]
+
+        border, border_src = dst[~to_core], src[~to_core]
+        unowned = owner[border] < 0
+        owner[border[unowned]] = border_src[unowned]
+
+        a, b = component[src[to_core]], component[dst[to_core]]
+        linked = a != b
+        if linked.any():
+            component = _merge_components(component, a[linked], b[linked])
+
+    if len(core_rows):
+        _, dense = np.unique(component[core_rows], return_inverse=True)
+        labels[core_rows] = dense
+        border_rows = np.flatnonzero(owner >= 0)
+        labels[border_rows] = labels[owner[border_rows]]
+    return labels, core
+
+
+class FaceClusterIndex:
+    """
+    Incremental face clustering.
+    The first batch is clustered with cluster_dbscan. Later batches are
+    assigned to the cluster of their nearest core face within eps, using a
+    BallTree over the core faces; faces matching no cluster are clustered
+    together with the earlier unclustered faces, and new clusters get new
+    labels. Existing labels never change, so nothing is reclustered.
+    Faces assigned to a cluster become core faces, so clusters can follow a
+    person's appearance over time. They are searched directly until there
+    are enough of them to rebuild the tree.
+    """
+    # Core faces searched outside the tree before it is rebuilt, at most
+    MAX_PENDING = 4096
+    # Points per distance product against the pending faces
+    QUERY_CHUNK = 1024
+
+    def __init__(self, eps=0.5, min_samples=2, rebuild_ratio=0.25):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.rebuild_ratio = rebuild_ratio
+        self.matrix = np.zeros((0, 128), dtype=np.float32)
+        self.labels = np.zeros(0, dtype=np.int64)
+        self.core = np.zeros(0, dtype=bool)
+        self.next_label = 0
+        self._tree = None
+        self._tree_rows = np.zeros(0, dtype=np.int64)
+        self._pending_rows = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def load(self, matrix, labels, core, next_label=None):
+        """Restores a previously built index, e.g. from disk."""
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.core = np.asarray(core, dtype=bool)
+        self.next_label = int(next_label if next_label is not None else self.labels.max(initial=NOISE) + 1)
+        self._rebuild()
+
+    def add(self, encodings):
+        """Adds faces and returns their labels (NOISE if they belong to no cluster yet)."""
+        new = encoding_matrix(encodings)
+        if len(new) == 0:
+            return np.zeros(0, dtype=np.int64)
+        new_rows = self._append(new)
+
+        # Nearest known core face within eps
+        nearest, distance = self._nearest_core(new)
+        matched = (nearest >= 0) & (distance <= self.eps)
+        self.labels[new_rows[matched]] = self.labels[nearest[matched]]
+        self.core[new_rows[matched]] = True
+        self._pending_rows = np.concatenate([self._pending_rows, new_rows[matched]])
+
+        # Unmatched faces are clustered with the earlier noise
+        candidates = np.flatnonzero(self.labels == NOISE)
+        if len(candidates) >= self.min_samples:
+            labels, core = cluster_dbscan(self.matrix[candidates], self.eps, self.min_samples)
+            clustered = labels != NOISE
+            self.labels[candidates[clustered]] = labels[clustered] + self.next_label
+            self.core[candidates[core]] = True
+            self._pending_rows = np.concatenate([self._pending_rows, candidates[core]])
+            self.next_label += int(labels.max(initial=NOISE)) + 1
+            logging.info(f"Face clustering: {int(clustered.sum())} of {len(candidates)} unclustered faces "
+                         f"formed {int(labels.max(initial=NOISE)) + 1} new clusters")
+
+        self._maybe_rebuild()
+        return self.labels[new_rows]
+
+    def assign(self, encodings, labels):
+        """Adds faces whose clusters are already known, e.g. matched by the caller; they become core faces."""
+        new = encoding_matrix(encodings)
+        if len(new) == 0:
+            return
+        new_rows = self._append(new)
+        self.labels[new_rows] = labels
+        self.core[new_rows] = True
+        self._pending_rows = np.concatenate([self._pending_rows, new_rows])
+        self._maybe_rebuild()
+
+    def _append(self, new):
+        """Appends unlabelled faces and returns their rows."""
+        first = len(self.matrix)
+        self.matrix = np.concatenate([self.matrix, new]) if first else new
+        self.labels = np.concatenate([self.labels, np.full(len(new), NOISE, dtype=np.int64)])
+        self.core = np.concatenate([self.core, np.zeros(len(new), dtype=bool)])
+        return np.arange(first, first + len(new))
+
+    def _maybe_rebuild(self):
+        if len(self._pending_rows) > min(self.rebuild_ratio * len(self._tree_rows), self.MAX_PENDING):
+            self._rebuild()
+
+    def _rebuild(self):
+        self._tree_rows = np.flatnonzero(self.core)
+        self._tree = neighbors.BallTree(self.matrix[self._tree_rows]) if len(self._tree_rows) else None
+        self._pending_rows = np.zeros(0, dtype=np.int64)
+
+    def _nearest_core(self, points):
+        """Returns (row, distance) of the nearest core face per point; row -1 when there is none."""
+        nearest = np.full(len(points), -1, dtype=np.int64)
+        distance = np.full(len(points), np.inf, dtype=np.float64)
+        if self._tree is not None:
+            dist, idx = self._tree.query(points, k=1)
+            nearest, distance = self._tree_rows[idx[:, 0]], dist[:, 0]
+        if len(self._pending_rows):
+            pending = self.matrix[self._pending_rows]
+            pending_sq = (pending ** 2).sum(1)
+            for start in range(0, len(points), self.QUERY_CHUNK):
+                chunk = points[start:start + self.QUERY_CHUNK]
+                # Squared distances via |a|^2 - 2ab + |b|^2, one matrix product per chunk
+                sq = (chunk ** 2).sum(1)[:, None] - 2 * chunk @ pending.T + pending_sq[None, :]
+                best = sq.argmin(1)
+                best_distance = np.sqrt(np.maximum(sq[np.arange(len(chunk)), best], 0))
+                closer = best_distance < distance[start:start + len(chunk)]
+                rows = np.flatnonzero(closer) + start
+                nearest[rows] = self._pending_rows[best[closer]]
+                distance[rows] = best_distance[closer]
+        return nearest, distance
@@ -0,0 +1,115 @@
+import os
+import logging
+import concurrent.futures
+from media_metadata import get_image_size
+from lazy_imports import lazy_import, module_available
+
+cv2 = lazy_import("cv2")
+face_recognition = lazy_import("face_recognition")
+FACE_PIPELINE_AVAILABLE = module_available("cv2", "face_recognition")
+
+# Longest image side used for face detection
+DETECT_MAX_SIDE = 1024
+# Faces at least this many pixels wide in the detection image are encoded from it
+# directly; smaller ones are encoded from the original (dlib's chip is 150x150)
+ENCODE_MIN_FACE = 100
+# Margin around a face, relative to its size, when cropping the original
+CROP_MARGIN = 0.5
+
+
+def _reduction(path, max_side):
+    """Largest decode reduction (1, 2, 4 or 8) that keeps the longer side at or above max_side."""
+    size = get_image_size(path)
+    if not size:
+        return 1
+    factor = 1
+    while factor < 8 and max(size) / (factor * 2) >= max_side:
+        factor *= 2
+    return factor
+
+
+def _load_rgb(path, factor=1):
+    reduced_modes = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+    image = cv2.imread(path, reduced_modes.get(factor, cv2.IMREAD_COLOR))
+    if image is None:
+        return None
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def encode_faces(path, max_side=DETECT_MAX_SIDE):
+    """
+    Returns the face encodings of one image.
+    Faces are located on an image decoded at reduced size (the longer side
+    between max_side and twice that; smaller images at full size). Faces
+    that are large enough there are encoded from it; the original is only
+    decoded, and then cropped around each remaining face, when small faces
+    need the detail.
+    """
+    factor = _reduction(path, max_side)
+    image = _load_rgb(path, factor)
+    if image is None:
+        raise ValueError("Could not decode image")
+    locations = face_recognition.face_locations(image)
+    if not locations:
+        return []
+
+    large = [loc for loc in locations if loc[1] - loc[3] >= ENCODE_MIN_FACE or factor == 1]
+    small = [loc for loc in locations if loc not in large]
+    encodings = face_recognition.face_encodings(image, large) if large else []
+    if small:
+        original = _load_rgb(path)
+        if original is None:
+            raise ValueError("Could not decode image")
+        height, width = original.shape[:2]
+        for top, right, bottom, left in small:
+            top, right, bottom, left = top * factor, right * factor, bottom * factor, left * factor
+            margin = int(max(bottom - top, right - left) * CROP_MARGIN)
+            y0, x0 = max(0, top - margin), max(0, left - margin)
+            y1, x1 = min(height, bottom + margin), min(width, right + margin)
+            crop = original[y0:y1, x0:x1]
+            encodings.extend(face_recognition.face_encodings(crop, [(top - y0, right - x0, bottom - y0, left - x0)]))
+    return encodings
+
+
+def _init_worker():
+    # dlib models are loaded once per process, when face_recognition is imported;
+    # the pool provides the parallelism, so OpenCV stays single threaded
+    cv2.setNumThreads(1)
+
+
+def _encode_chunk(paths, max_side):
+    """Worker entry point: returns (path, encodings, error) per path."""
+    results = []
+    for path in paths:
+        try:
+            results.append((path, encode_faces(path, max_side), None))
+        except Exception as e:
+            results.append((path, None, str(e)))
+    return results
+
+
+class FacePipeline:
+    """
+    Encodes faces of many images on a process pool. Paths are sent in chunks
+    so each worker keeps its dlib models loaded, and results are yielded as
+    chunks finish so the caller can cluster while encoding continues.
+    """
+    def __init__(self, max_workers=None, chunk_size=16, max_side=DETECT_MAX_SIDE):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_side = max_side
+
+    def iter_encodings(self, paths):
+        """Yields (path, encodings, error) for every path, in completion order."""
+        chunks = [paths[i:i + self.chunk_size] for i in range(0, len(paths), self.chunk_size)]
+        if not chunks:
+            return
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as executor:
+            futures = {executor.submit(_encode_chunk, chunk, self.max_side): chunk for chunk in chunks}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logging.error(f"Face encoding worker failed: {e}")
+                    results = [(path, None, str(e)) for path in futures[future]]
+                yield from results
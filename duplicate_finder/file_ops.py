@@ -0,0 +1,45 @@
+import os
+import logging
+import concurrent.futures
+
+
+def _delete_batch(batch):
+    deleted = []
+    freed = 0
+    errors = []
+    for path, size in batch:
+        try:
+            os.remove(path)
+            deleted.append(path)
+            freed += size
+        except OSError as e:
+            errors.append((path, str(e)))
+    return deleted, freed, errors
+
+
+def delete_files(files, batch_size=256, max_workers=None, progress_callback=None):
+    """
+    Deletes files in parallel batches.
+    files: list of (path, size) with sizes known from the scan, so nothing is re-stat'ed.
+    Returns (deleted_paths, bytes_freed, errors).
+    """
+    batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+    deleted = []
+    freed = 0
+    errors = []
+    done = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_delete_batch, batch): len(batch) for batch in batches}
+        for future in concurrent.futures.as_completed(futures):
+            batch_deleted, batch_freed, batch_errors = future.result()
+            deleted.extend(batch_deleted)
+            freed += batch_freed
+            errors.extend(batch_errors)
+            done += futures[future]
+            if progress_callback:
+                progress_callback(done, len(files))
+
+    for path, error in errors:
+        logging.error(f"Error deleting {path}: {error}")
+    return deleted, freed, errors
@@ -0,0 +1,159 @@
+import sqlite3
+from datetime import datetime
+from move_engine import MoveEntry
+
+
+class MoveJournal:
+    """
+    Persists move plans so that consolidate/organize runs can be inspected
+    before execution, resumed after a crash and undone afterwards.
+    Run status goes planned -> running -> completed (-> undone).
+    """
+    def __init__(self, db_path="move_journal.db"):
+        self.db_path = db_path
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def init_db(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT,
+                root TEXT,
+                created TEXT,
+                status TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                run_id INTEGER,
+                seq INTEGER,
+                source TEXT,
+                target TEXT,
+                size INTEGER,
+                done INTEGER DEFAULT 0,
+                PRIMARY KEY (run_id, seq)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS skipped (
+                run_id INTEGER,
+                source TEXT,
+                duplicate_of TEXT,
+                size INTEGER
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def create_run(self, kind, root, plan, status="planned"):
+        """Stores a plan (list of MoveEntry) and returns the new run id."""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('INSERT INTO runs (kind, root, created, status) VALUES (?, ?, ?, ?)',
+                       (kind, root, datetime.now().isoformat(), status))
+        run_id = cursor.lastrowid
+        cursor.executemany('INSERT INTO entries (run_id, seq, source, target, size) VALUES (?, ?, ?, ?, ?)',
+                           ((run_id, seq, e.source, e.target, e.size) for seq, e in enumerate(plan)))
+        conn.commit()
+        conn.close()
+        return run_id
+
+    def record_skipped(self, run_id, skipped):
+        """Records files left in place because identical content exists; skipped holds (source, duplicate_of, size)."""
+        conn = self._connect()
+        conn.executemany('INSERT INTO skipped (run_id, source, duplicate_of, size) VALUES (?, ?, ?, ?)',
+                         ((run_id, source, duplicate_of, size) for source, duplicate_of, size in skipped))
+        conn.commit()
+        conn.close()
+
+    def get_skipped(self, run_id):
+        conn = self._connect()
+        rows = conn.execute('SELECT source, duplicate_of, size FROM skipped WHERE run_id = ?', (run_id,)).fetchall()
+        conn.close()
+        return rows
+
+    def set_status(self, run_id, status):
+        conn = self._connect()
+        conn.execute('UPDATE runs SET status = ? WHERE id = ?', (status, run_id))
+        conn.commit()
+        conn.close()
+
+    def get_run(self, run_id):
+        conn = self._connect()
+        row = conn.execute('SELECT id, kind, root, created, status FROM runs WHERE id = ?', (run_id,)).fetchone()
+        conn.close()
+        return self._run_record(row) if row else None
+
+    def get_runs(self, kind=None, statuses=None, root=None):
+        """Returns run records, newest first, optionally filtered."""
+        query = 'SELECT id, kind, root, created, status FROM runs WHERE 1 = 1'
+        params = []
+        if kind:
+            query += ' AND kind = ?'
+            params.append(kind)
+        if root:
+            query += ' AND root = ?'
+            params.append(root)
+        if statuses:
+            query += f' AND status IN ({", ".join("?" * len(statuses))})'
+            params.extend(statuses)
+        query += ' ORDER BY id DESC'
+        conn = self._connect()
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+        return [self._run_record(row) for row in rows]
+
+    def incomplete_runs(self, kind=None, root=None):
+        return self.get_runs(kind, ("planned", "running"), root)
+
+    def entries(self, run_id, done=None):
+        """Returns (seq, MoveEntry) pairs in plan order, optionally filtered by done state."""
+        query = 'SELECT seq, source, target, size FROM entries WHERE run_id = ?'
+        params = [run_id]
+        if done is not None:
+            query += ' AND done = ?'
+            params.append(int(done))
+        query += ' ORDER BY seq'
+        conn = self._connect()
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+        return [(row[0], MoveEntry(row[1], row[2], row[3])) for row in rows]
+
+    def mark_done(self, run_id, seqs, done=True):
+        conn = self._connect()
+        conn.executemany('UPDATE entries SET done = ? WHERE run_id = ? AND seq = ?',
+                         ((int(done), run_id, seq) for seq in seqs))
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _run_record(row):
+        return {'id': row[0], 'kind': row[1], 'root': row[2], 'created': row[3], 'status': row[4]}
+
+
+class JournalCheckpoint:
+    """
+    Records completed entries of a running plan in batches, so a crash
+    loses at most one batch of bookkeeping (which resume reconciles).
+    """
+    def __init__(self, journal, run_id, seq_entries, batch_size=500):
+        self.journal = journal
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self._seq_by_source = {entry.source: seq for seq, entry in seq_entries}
+        self._pending = []
+
+    def record(self, entry):
+        self._pending.append(self._seq_by_source[entry.source])
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.journal.mark_done(self.run_id, self._pending)
+            self._pending = []
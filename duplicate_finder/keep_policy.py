@@ -0,0 +1,180 @@
+import os
+import logging
+import concurrent.futures
+from media_metadata import get_image_size
+
+
+class ResultTable:
+    """
+    Column-oriented view of scan results: one row per file, groups are
+    contiguous row ranges. Policies compute a whole key column in one pass.
+    """
+    def __init__(self, duplicates):
+        self.paths = []
+        self.sizes = []
+        self.mtimes = []
+        self.group_ranges = []
+        for group in duplicates:
+            start = len(self.paths)
+            files = group['files']
+            mtimes = group.get('mtimes') or []
+            self.paths.extend(files)
+            self.sizes.extend([group['size']] * len(files))
+            self.mtimes.extend(mtimes[i] if i < len(mtimes) else None for i in range(len(files)))
+            self.group_ranges.append((start, len(self.paths)))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def mtime_column(self):
+        """Returns mtimes, stat'ing only the rows the scan did not record."""
+        column = list(self.mtimes)
+        for i, mtime in enumerate(column):
+            if mtime is None:
+                try:
+                    column[i] = os.path.getmtime(self.paths[i])
+                except OSError:
+                    column[i] = 0
+        return column
+
+
+class DeletionPlan:
+    def __init__(self):
+        self.keep = []
+        self.delete = []
+        # (kept_path, duplicate_path) per deleted file, for linking instead of deleting
+        self.pairs = []
+        self.selections = []
+
+    @property
+    def bytes_reclaimed(self):
+        return sum(size for _, size in self.delete)
+
+    def summary(self):
+        return (f"Keep {len(self.keep)} files, delete {len(self.delete)} files "
+                f"({self.bytes_reclaimed / (1024 * 1024):.2f} MB reclaimed).")
+
+
+# --- Policies ---------------------------------------------------------------
+# Each policy takes the table (and an optional argument) and returns one key per
+# row. Lower keys are preferred for keeping; later policies break ties.
+
+def _split_prefixes(arg):
+    return [os.path.normcase(os.path.abspath(p)) for p in (arg or "").split('|') if p]
+
+
+def _under(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def prefer_path(table, arg):
+    """Keeps files under the given directories first; earlier directories win."""
+    prefixes = _split_prefixes(arg)
+    fallback = len(prefixes)
+    column = []
+    for path in table.paths:
+        path = os.path.normcase(os.path.abspath(path))
+        column.append(next((i for i, p in enumerate(prefixes) if _under(path, p)), fallback))
+    return column
+
+
+def avoid_path(table, arg):
+    """Keeps files outside the given directories first."""
+    prefixes = _split_prefixes(arg)
+    return [int(any(_under(os.path.normcase(os.path.abspath(p)), pre) for pre in prefixes)) for p in table.paths]
+
+
+def in_catalog(table, arg):
+    """Keeps files already inside a catalog (by default any ConsolidatedMedia folder)."""
+    if arg:
+        return [1 - v for v in avoid_path(table, arg)]
+    return [0 if "ConsolidatedMedia" in os.path.normpath(p).split(os.sep) else 1 for p in table.paths]
+
+
+def shortest_path(table, arg):
+    return [len(p) for p in table.paths]
+
+
+def oldest(table, arg):
+    return table.mtime_column()
+
+
+def newest(table, arg):
+    return [-m for m in table.mtime_column()]
+
+
+def largest_resolution(table, arg):
+    """Keeps the file with the most pixels; headers are read on a thread pool."""
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        dims = list(executor.map(get_image_size, table.paths, chunksize=64))
+    return [-(d[0] * d[1]) if d else 0 for d in dims]
+
+
+KEEP_POLICIES = {
+    'prefer_path': prefer_path,
+    'avoid_path': avoid_path,
+    'in_catalog': in_catalog,
+    'shortest_path': shortest_path,
+    'oldest': oldest,
+    'newest': newest,
+    'largest_resolution': largest_resolution,
+}
+
+
+def parse_policy(spec):
+    """
+    Parses a policy string such as "prefer_path:/photos|/backup,oldest,shortest_path"
+    into a list of (name, argument) rules.
+    """
+    rules = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition(':')
+        name = name.strip()
+        if name not in KEEP_POLICIES:
+            raise ValueError(f"Unknown keep policy '{name}'. Available: {', '.join(sorted(KEEP_POLICIES))}")
+        rules.append((name, arg.strip() or None))
+    if not rules:
+        raise ValueError("Empty keep policy")
+    return rules
+
+
+class KeepPolicyEngine:
+    """
+    Decides which file of every duplicate group to keep.
+    Works on scan result dicts only, so it can be driven from the CLI or a UI worker.
+    """
+    def __init__(self, rules):
+        if isinstance(rules, str):
+            rules = parse_policy(rules)
+        self.rules = rules
+
+    def plan(self, duplicates, progress_callback=None):
+        table = ResultTable(duplicates)
+        columns = []
+        for i, (name, arg) in enumerate(self.rules):
+            logging.info(f"Evaluating keep policy {name} over {len(table)} files")
+            columns.append(KEEP_POLICIES[name](table, arg))
+            if progress_callback:
+                progress_callback(i + 1, len(self.rules) + 1)
+        # Row index is the final tie-breaker, so the first listed file wins ties
+        keys = list(zip(*columns, range(len(table))))
+
+        plan = DeletionPlan()
+        for start, end in table.group_ranges:
+            keep_row = min(range(start, end), key=keys.__getitem__) if end > start else None
+            checks = bytearray(end - start)
+            for row in range(start, end):
+                if row == keep_row:
+                    plan.keep.append(table.paths[row])
+                else:
+                    checks[row - start] = 1
+                    plan.delete.append((table.paths[row], table.sizes[row]))
+                    plan.pairs.append((table.paths[keep_row], table.paths[row]))
+            plan.selections.append(checks)
+
+        if progress_callback:
+            progress_callback(len(self.rules) + 1, len(self.rules) + 1)
+        return plan
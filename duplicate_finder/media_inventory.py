@@ -0,0 +1,169 @@
+import os
+import logging
+import threading
+from collections import namedtuple
+from video_frames import VIDEO_EXTENSIONS
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp')
+
+# Windows attribute of cloud placeholders (iCloud/OneDrive) whose content is not on disk
+FILE_ATTRIBUTE_OFFLINE = 0x1000
+
+# kind is "image", "video", "junk" (AppleDouble ._* files) or "other"
+InventoryEntry = namedtuple('InventoryEntry', ['path', 'name', 'size', 'mtime', 'kind', 'offline'])
+
+
+def file_kind(name):
+    if name.startswith("._"):
+        return "junk"
+    ext = os.path.splitext(name)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    if ext in VIDEO_EXTENSIONS:
+        return "video"
+    return "other"
+
+
+class MediaInventory:
+    """
+    One traversal of a directory tree, shared by every stage of a job.
+    The walk (os.scandir, one stat per file; symlinks are not followed)
+    fills a table of InventoryEntry rows and counts the entries of every
+    directory it lists. Stages read the table through stream(), which
+    yields rows while the walk is still running and replays the finished
+    table to stages that start later, so a job that consolidates, dedupes
+    and classifies the same tree enumerates and stats it once.
+    skip_dir(path, name) returning True prunes a directory from the walk.
+    """
+    def __init__(self, root, skip_dir=None):
+        self.root = root
+        self.skip_dir = skip_dir
+        self.entries = []
+        # Entries (files, folders and anything else) per listed directory
+        self.dir_counts = {}
+        self._cond = threading.Condition()
+        self._started = False
+        self._complete = False
+
+    @classmethod
+    def from_entries(cls, root, entries, dir_counts=None):
+        """A completed inventory over rows that are already known, e.g. from a catalog."""
+        inventory = cls(root)
+        inventory.entries = list(entries)
+        inventory.dir_counts = dict(dir_counts or {})
+        inventory._started = inventory._complete = True
+        return inventory
+
+    @property
+    def complete(self):
+        return self._complete
+
+    def start(self):
+        """Starts the walk on a background thread unless it has started already. Returns self."""
+        with self._cond:
+            if self._started:
+                return self
+            self._started = True
+        threading.Thread(target=self._walk, name="MediaInventory", daemon=True).start()
+        return self
+
+    def scan(self):
+        """Walks the tree on the calling thread, or waits for the walk already running. Returns self."""
+        with self._cond:
+            started, self._started = self._started, True
+        if started:
+            self.wait()
+        else:
+            self._walk()
+        return self
+
+    def wait(self):
+        with self._cond:
+            while not self._complete:
+                self._cond.wait()
+
+    def stream(self, kinds=None, skip_dir=None):
+        """
+        Yields the rows of the table, starting the walk in the background if
+        nothing started it. Rows are yielded as soon as their directory has
+        been listed. kinds restricts the rows to those kinds; skip_dir(path,
+        name) hides the rows below directories it rejects, for stages that
+        exclude more of the tree than the walk did.
+        """
+        self.start()
+        skipped = {}
+        position = 0
+        while True:
+            with self._cond:
+                while position >= len(self.entries) and not self._complete:
+                    self._cond.wait()
+                rows = self.entries[position:]
+                done = self._complete
+            position += len(rows)
+            for row in rows:
+                if kinds and row.kind not in kinds:
+                    continue
+                if skip_dir and self._is_skipped(os.path.dirname(row.path), skip_dir, skipped):
+                    continue
+                yield row
+            if done:
+                return
+
+    def directories(self, skip_dir=None):
+        """Returns {directory: entry count} once the walk is complete, without the directories skip_dir rejects."""
+        self.wait()
+        if skip_dir is None:
+            return dict(self.dir_counts)
+        skipped = {}
+        return {directory: count for directory, count in self.dir_counts.items()
+                if not self._is_skipped(directory, skip_dir, skipped)}
+
+    def _is_skipped(self, directory, skip_dir, memo):
+        """True if skip_dir rejects directory or one of its ancestors below the root."""
+        if directory in memo:
+            return memo[directory]
+        if len(directory) <= len(self.root):
+            result = False
+        else:
+            result = (skip_dir(directory, os.path.basename(directory))
+                      or self._is_skipped(os.path.dirname(directory), skip_dir, memo))
+        memo[directory] = result
+        return result
+
+    def _walk(self):
+        stack = [self.root]
+        try:
+            while stack:
+                directory = stack.pop()
+                rows = []
+                count = 0
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            count += 1
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    if not (self.skip_dir and self.skip_dir(entry.path, entry.name)):
+                                        stack.append(entry.path)
+                                elif entry.is_file(follow_symlinks=False):
+                                    st = entry.stat(follow_symlinks=False)
+                                    offline = bool(getattr(st, 'st_file_attributes', 0) & FILE_ATTRIBUTE_OFFLINE)
+                                    rows.append(InventoryEntry(entry.path, entry.name, st.st_size, st.st_mtime,
+                                                               file_kind(entry.name), offline))
+                            except OSError as e:
+                                logging.warning(f"Could not access {entry.path}: {e}")
+                except OSError as e:
+                    logging.warning(f"Could not list {directory}: {e}")
+                    continue
+                # Rows are published a directory at a time to keep locking cheap
+                with self._cond:
+                    self.dir_counts[directory] = count
+                    self.entries.extend(rows)
+                    self._cond.notify_all()
+        except Exception as e:
+            logging.error(f"Error scanning directory {self.root}: {e}")
+        finally:
+            with self._cond:
+                self._complete = True
+                self._cond.notify_all()
+        logging.info(f"Inventory of {self.root}: {len(self.entries)} files in {len(self.dir_counts)} folders")
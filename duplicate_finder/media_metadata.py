@@ -0,0 +1,288 @@
+import struct
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+# Capture time (naive datetime) and camera make/model; any field may be None
+MediaInfo = namedtuple('MediaInfo', ['taken', 'make', 'model'])
+
+# JPEG start-of-frame markers carrying the image dimensions (DHT/JPG/DAC excluded)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def get_image_size(file_path):
+    """
+    Returns (width, height) read from the image header, or None.
+    Only the first bytes of the file are read; nothing is decoded.
+    Supports JPEG, PNG, GIF, BMP and WebP.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(32)
+            if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+                return struct.unpack('>II', head[16:24])
+            if head[:6] in (b'GIF87a', b'GIF89a'):
+                return struct.unpack('<HH', head[6:10])
+            if head.startswith(b'BM') and len(head) >= 26:
+                width, height = struct.unpack('<ii', head[18:26])
+                return width, abs(height)
+            if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+                return _webp_size(head)
+            if head.startswith(b'\xff\xd8'):
+                f.seek(2)
+                return _jpeg_size(f)
+    except (OSError, struct.error) as e:
+        logging.debug(f"Could not read image header of {file_path}: {e}")
+    return None
+
+
+def _jpeg_size(f):
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:
+            # Fill byte; the marker code follows
+            f.seek(-1, 1)
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if code in _JPEG_SOF_MARKERS:
+            segment = f.read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack('>HH', segment[1:5])
+            return width, height
+        f.seek(length - 2, 1)
+
+
+def _webp_size(head):
+    chunk = head[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        bits = int.from_bytes(head[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+# --- Capture metadata ---------------------------------------------------------
+# Only the container structure leading to the EXIF block / movie header is read;
+# pixel and sample data are skipped with seeks.
+
+_TIFF_MAKE = 0x010F
+_TIFF_MODEL = 0x0110
+_TIFF_DATETIME = 0x0132
+_TIFF_EXIF_IFD = 0x8769
+_EXIF_DATETIME_ORIGINAL = 0x9003
+_EXIF_DATETIME_DIGITIZED = 0x9004
+_TIFF_MAX_ENTRIES = 512
+_QUICKTIME_EPOCH = datetime(1904, 1, 1)
+_QUICKTIME_BRANDS = (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip')
+
+
+def get_media_info(file_path):
+    """
+    Returns MediaInfo read from the file's metadata header, or None.
+    Reads EXIF from JPEG, TIFF, PNG (eXIf) and WebP, and the movie header
+    (creation time, \xa9mak/\xa9mod user data) from MP4/MOV/M4V.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(16)
+            if head.startswith(b'\xff\xd8'):
+                f.seek(2)
+                return _jpeg_exif(f)
+            if head[:4] in (b'II*\x00', b'MM\x00*'):
+                return _read_tiff(f, 0)
+            if head.startswith(b'\x89PNG\r\n\x1a\n'):
+                return _png_exif(f)
+            if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+                return _webp_exif(f)
+            if head[4:8] in _QUICKTIME_BRANDS:
+                return _quicktime_info(f)
+    except (OSError, struct.error, ValueError) as e:
+        logging.debug(f"Could not read metadata of {file_path}: {e}")
+    return None
+
+
+def _jpeg_exif(f):
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0xFF:
+            f.seek(-1, 1)
+            continue
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xDA, 0xD9):
+            # Start of scan / end of image: no EXIF before the image data
+            return None
+        length = struct.unpack('>H', f.read(2))[0]
+        segment_end = f.tell() + length - 2
+        if code == 0xE1 and f.read(6) == b'Exif\x00\x00':
+            return _read_tiff(f, f.tell())
+        f.seek(segment_end)
+
+
+def _png_exif(f):
+    f.seek(8)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        length, chunk = struct.unpack('>I4s', header)
+        if chunk == b'eXIf':
+            return _read_tiff(f, f.tell())
+        if chunk in (b'IDAT', b'IEND'):
+            return None
+        f.seek(length + 4, 1)
+
+
+def _webp_exif(f):
+    f.seek(12)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return None
+        chunk, length = struct.unpack('<4sI', header)
+        if chunk == b'EXIF':
+            start = f.tell()
+            # Some writers keep the JPEG APP1 prefix
+            if f.read(6) != b'Exif\x00\x00':
+                f.seek(start)
+            return _read_tiff(f, f.tell())
+        f.seek(length + (length & 1), 1)
+
+
+def _read_tiff(f, base):
+    """Reads make, model and capture time from the TIFF structure starting at file offset base."""
+    f.seek(base)
+    header = f.read(8)
+    if header[:2] == b'II':
+        order = '<'
+    elif header[:2] == b'MM':
+        order = '>'
+    else:
+        return None
+    ifd0 = _read_ifd(f, base, order, struct.unpack(order + 'I', header[4:8])[0])
+    exif = {}
+    if _TIFF_EXIF_IFD in ifd0:
+        exif = _read_ifd(f, base, order, ifd0[_TIFF_EXIF_IFD])
+
+    taken = None
+    for tags, tag in ((exif, _EXIF_DATETIME_ORIGINAL), (exif, _EXIF_DATETIME_DIGITIZED), (ifd0, _TIFF_DATETIME)):
+        taken = _exif_datetime(tags.get(tag))
+        if taken:
+            break
+    return MediaInfo(taken, ifd0.get(_TIFF_MAKE), ifd0.get(_TIFF_MODEL))
+
+
+def _read_ifd(f, base, order, offset):
+    """Returns {tag: value} for the ASCII tags and the Exif IFD pointer of one IFD."""
+    f.seek(base + offset)
+    count_bytes = f.read(2)
+    if len(count_bytes) < 2:
+        return {}
+    count = min(struct.unpack(order + 'H', count_bytes)[0], _TIFF_MAX_ENTRIES)
+    raw = f.read(count * 12)
+    values = {}
+    strings = []
+    for i in range(len(raw) // 12):
+        tag, kind, n, value = struct.unpack(order + 'HHII', raw[i * 12:i * 12 + 12])
+        if tag == _TIFF_EXIF_IFD:
+            values[tag] = value
+        elif kind == 2 and tag in (_TIFF_MAKE, _TIFF_MODEL, _TIFF_DATETIME,
+                                   _EXIF_DATETIME_ORIGINAL, _EXIF_DATETIME_DIGITIZED):
+            if n <= 4:
+                values[tag] = _ascii(raw[i * 12 + 8:i * 12 + 8 + n])
+            else:
+                strings.append((tag, value, min(n, 256)))
+    # Out-of-line strings are read after the entry table, in file order
+    for tag, value, n in sorted(strings, key=lambda s: s[1]):
+        f.seek(base + value)
+        values[tag] = _ascii(f.read(n))
+    return values
+
+
+def _ascii(data):
+    text = data.split(b'\x00', 1)[0].decode('ascii', 'replace').strip()
+    return text or None
+
+
+def _exif_datetime(text):
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text[:19], '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        # Unset clocks write "0000:00:00 00:00:00"
+        return None
+
+
+def _atoms(f, start, end):
+    """Yields (type, payload_start, atom_end) for the QuickTime atoms between start and end."""
+    position = start
+    while end is None or position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack('>I4s', header)
+        payload = position + 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            payload += 8
+        elif size == 0:
+            # Extends to the end of the file
+            f.seek(0, 2)
+            size = f.tell() - position
+        if size < payload - position:
+            return
+        yield kind, payload, position + size
+        position += size
+
+
+def _quicktime_info(f):
+    for kind, payload, atom_end in _atoms(f, 0, None):
+        if kind != b'moov':
+            continue
+        taken = make = model = None
+        for child, child_payload, child_end in _atoms(f, payload, atom_end):
+            if child == b'mvhd':
+                f.seek(child_payload)
+                version = f.read(4)[0]
+                seconds = struct.unpack('>Q' if version == 1 else '>I', f.read(8 if version == 1 else 4))[0]
+                if seconds:
+                    taken = _QUICKTIME_EPOCH + timedelta(seconds=seconds)
+            elif child == b'udta':
+                for item, item_payload, item_end in _atoms(f, child_payload, child_end):
+                    if item in (b'\xa9mak', b'\xa9mod'):
+                        f.seek(item_payload)
+                        value = _quicktime_text(f.read(min(item_end - item_payload, 256)))
+                        if item == b'\xa9mak':
+                            make = value
+                        else:
+                            model = value
+        return MediaInfo(taken, make, model)
+    return None
+
+
+def _quicktime_text(data):
+    # iTunes-style items wrap the text in a 'data' atom; classic user data has a length and language prefix
+    if data[4:8] == b'data':
+        return data[16:].decode('utf-8', 'replace').strip() or None
+    length = struct.unpack('>H', data[:2])[0]
+    return data[4:4 + length].decode('utf-8', 'replace').strip() or None
@@ -0,0 +1,103 @@
+import sqlite3
+import logging
+import concurrent.futures
+from datetime import datetime
+from media_metadata import MediaInfo, get_media_info
+
+
+class MetadataCache:
+    """
+    Persists MediaInfo per file, keyed by (path, size, mtime), so unchanged
+    files are never parsed twice. Files without metadata are cached too.
+    """
+    # Paths per SELECT, below SQLite's bound-parameter limit
+    QUERY_BATCH = 500
+
+    def __init__(self, db_path="metadata_cache.db"):
+        self.db_path = db_path
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def init_db(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS media_info (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime REAL,
+                found INTEGER,
+                taken TEXT,
+                make TEXT,
+                model TEXT
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def get_many(self, items):
+        """
+        Looks up (path, size, mtime) items. Returns {path: MediaInfo or None}
+        for the cached, unchanged files only.
+        """
+        wanted = {path: (size, mtime) for path, size, mtime in items}
+        paths = list(wanted)
+        hits = {}
+        conn = self._connect()
+        for start in range(0, len(paths), self.QUERY_BATCH):
+            batch = paths[start:start + self.QUERY_BATCH]
+            rows = conn.execute(
+                f'SELECT path, size, mtime, found, taken, make, model FROM media_info '
+                f'WHERE path IN ({", ".join("?" * len(batch))})', batch).fetchall()
+            for path, size, mtime, found, taken, make, model in rows:
+                if (size, mtime) != wanted[path]:
+                    continue
+                hits[path] = MediaInfo(datetime.fromisoformat(taken) if taken else None, make, model) if found else None
+        conn.close()
+        return hits
+
+    def put_many(self, results):
+        """Stores (path, size, mtime, MediaInfo or None) rows."""
+        conn = self._connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO media_info (path, size, mtime, found, taken, make, model) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((path, size, mtime, int(info is not None),
+              info.taken.isoformat() if info and info.taken else None,
+              info.make if info else None, info.model if info else None)
+             for path, size, mtime, info in results))
+        conn.commit()
+        conn.close()
+
+
+class MetadataExtractor:
+    """
+    Reads MediaInfo for many files: cache hits first, the rest on a thread
+    pool (header reads are I/O bound), and the new results are written back.
+    """
+    def __init__(self, cache=None, max_workers=8):
+        self.cache = cache
+        self.max_workers = max_workers
+
+    def extract(self, items, progress_callback=None):
+        """
+        items: (path, size, mtime) tuples, e.g. from a directory scan.
+        Returns {path: MediaInfo or None}.
+        """
+        items = list(items)
+        results = self.cache.get_many(items) if self.cache else {}
+        missing = [item for item in items if item[0] not in results]
+        logging.info(f"Metadata: {len(results)} cached, {len(missing)} to read")
+
+        parsed = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            infos = executor.map(get_media_info, [path for path, _, _ in missing], chunksize=64)
+            for i, ((path, size, mtime), info) in enumerate(zip(missing, infos), 1):
+                results[path] = info
+                parsed.append((path, size, mtime, info))
+                if progress_callback:
+                    progress_callback(i, len(missing))
+
+        if self.cache and parsed:
+            self.cache.put_many(parsed)
+        return results
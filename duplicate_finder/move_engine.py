@@ -0,0 +1,172 @@
+import os
+import errno
+import shutil
+import logging
+import threading
+import concurrent.futures
+from collections import namedtuple
+
+MoveEntry = namedtuple('MoveEntry', ['source', 'target', 'size'])
+
+
+def copy_file_data(source, target, chunk_size=8 * 1024 * 1024):
+    """
+    Copies file contents in the kernel where possible (copy_file_range, then
+    sendfile), falling back to a buffered copy. The target must not exist.
+    """
+    with open(source, 'rb') as src, open(target, 'xb') as dst:
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        remaining = os.fstat(src_fd).st_size
+
+        for kernel_copy in (getattr(os, 'copy_file_range', None), getattr(os, 'sendfile', None)):
+            if kernel_copy is None:
+                continue
+            try:
+                while remaining > 0:
+                    if kernel_copy is os.sendfile:
+                        sent = os.sendfile(dst_fd, src_fd, None, min(chunk_size, remaining))
+                    else:
+                        sent = kernel_copy(src_fd, dst_fd, min(chunk_size, remaining))
+                    if sent == 0:
+                        break
+                    remaining -= sent
+                if remaining <= 0:
+                    break
+            except OSError as e:
+                # Unsupported for this pair of filesystems; try the next method from the current offset
+                if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.ENOTSOCK):
+                    raise
+        else:
+            shutil.copyfileobj(src, dst, chunk_size)
+    shutil.copystat(source, target)
+
+
+class MoveEngine:
+    """
+    Executes a precomputed list of MoveEntry items.
+    Moves within one device are plain renames. Moves across devices are
+    copied on a bounded worker pool, made durable with fsync in batches,
+    and only then are their sources removed.
+    """
+    def __init__(self, max_workers=4, fsync_batch=64):
+        self.max_workers = max_workers
+        self.fsync_batch = fsync_batch
+        self._device_cache = {}
+        self._lock = threading.Lock()
+
+    def _device(self, directory):
+        with self._lock:
+            dev = self._device_cache.get(directory)
+        if dev is None:
+            dev = os.stat(directory).st_dev
+            with self._lock:
+                self._device_cache[directory] = dev
+        return dev
+
+    def execute(self, plan, result_callback=None):
+        """
+        Runs every move in plan. result_callback(entry, error) is called once
+        per entry from the calling thread, with error None on success.
+        Returns (files_moved, bytes_moved, errors).
+        """
+        moved = 0
+        moved_bytes = 0
+        errors = []
+
+        def report(entry, error):
+            nonlocal moved, moved_bytes
+            if error is None:
+                moved += 1
+                moved_bytes += entry.size
+            else:
+                errors.append((entry, error))
+            if result_callback:
+                result_callback(entry, error)
+
+        for directory in {os.path.dirname(e.target) for e in plan}:
+            os.makedirs(directory, exist_ok=True)
+
+        # Stage 1: renames for everything that stays on its device
+        cross_device = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for entry, error in executor.map(self._try_rename, plan):
+                if error == 'EXDEV':
+                    cross_device.append(entry)
+                else:
+                    report(entry, error)
+
+        # Stage 2: copies across devices, fsync'ed and unlinked in batches
+        if cross_device:
+            logging.info(f"Copying {len(cross_device)} files across devices")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for start in range(0, len(cross_device), self.fsync_batch):
+                    batch = cross_device[start:start + self.fsync_batch]
+                    copied = []
+                    for entry, error in executor.map(self._copy, batch):
+                        if error is None:
+                            copied.append(entry)
+                        else:
+                            report(entry, error)
+                    for entry, error in self._commit(copied):
+                        report(entry, error)
+
+        return moved, moved_bytes, errors
+
+    def _try_rename(self, entry):
+        try:
+            if self._device(os.path.dirname(entry.source)) != self._device(os.path.dirname(entry.target)):
+                return entry, 'EXDEV'
+            if os.path.exists(entry.target):
+                return entry, f"Target already exists: {entry.target}"
+            os.rename(entry.source, entry.target)
+            return entry, None
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                return entry, 'EXDEV'
+            return entry, str(e)
+
+    def _copy(self, entry):
+        try:
+            copy_file_data(entry.source, entry.target)
+            return entry, None
+        except OSError as e:
+            try:
+                if os.path.exists(entry.target) and os.path.exists(entry.source):
+                    os.remove(entry.target)
+            except OSError:
+                pass
+            return entry, str(e)
+
+    def _commit(self, copied):
+        """Flushes a batch of copies to disk, then removes their sources."""
+        results = []
+        durable = []
+        for entry in copied:
+            try:
+                fd = os.open(entry.target, os.O_RDWR)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                durable.append(entry)
+            except OSError as e:
+                results.append((entry, f"fsync failed: {e}"))
+
+        if hasattr(os, 'O_DIRECTORY'):
+            for directory in {os.path.dirname(e.target) for e in durable}:
+                try:
+                    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                except OSError:
+                    pass
+
+        for entry in durable:
+            try:
+                os.remove(entry.source)
+                results.append((entry, None))
+            except OSError as e:
+                results.append((entry, f"Copied but could not remove source: {e}"))
+        return results
@@ -0,0 +1,65 @@
+import os
+import threading
+
+
+class _DirectoryNames:
+    __slots__ = ('lock', 'taken', 'counters')
+
+    def __init__(self, directory):
+        self.lock = threading.Lock()
+        try:
+            self.taken = {os.path.normcase(name) for name in os.listdir(directory)}
+        except OSError:
+            self.taken = set()
+        # Next suffix to try per requested name, so repeated collisions don't re-probe from _1
+        self.counters = {}
+
+
+class UniqueNameAllocator:
+    """
+    Hands out collision-free filenames per target directory.
+    Each directory is listed once; after that, names are allocated from the
+    cached listing and per-name counters without touching the filesystem.
+    Allocated names count as taken, so concurrent workers never get the same name.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._directories = {}
+
+    def _names(self, directory):
+        key = os.path.normcase(os.path.abspath(directory))
+        with self._lock:
+            names = self._directories.get(key)
+            if names is None:
+                names = _DirectoryNames(directory)
+                self._directories[key] = names
+        return names
+
+    def allocate(self, directory, filename):
+        """
+        Returns filename, or filename with _1, _2, ... appended before the
+        extension if it is already taken in directory.
+        """
+        names = self._names(directory)
+        folded = os.path.normcase(filename)
+        with names.lock:
+            candidate = filename
+            if folded in names.taken:
+                stem, ext = os.path.splitext(filename)
+                counter = names.counters.get(folded, 1)
+                while True:
+                    candidate = f"{stem}_{counter}{ext}"
+                    counter += 1
+                    if os.path.normcase(candidate) not in names.taken:
+                        break
+                names.counters[folded] = counter
+            names.taken.add(os.path.normcase(candidate))
+        return candidate
+
+    def forget(self, directory=None):
+        """Drops cached listings (all of them, or one directory's) so they are re-read on next use."""
+        with self._lock:
+            if directory is None:
+                self._directories.clear()
+            else:
+                self._directories.pop(os.path.normcase(os.path.abspath(directory)), None)
@@ -0,0 +1,223 @@
+import os
+import logging
+import itertools
+import concurrent.futures
+from collections import deque
+from ai_organizer import NUDENET_AVAILABLE, VIDEO_KEYFRAMES, detections_score
+from skin_detection import SKIN_DETECTION_AVAILABLE, SKIN_MODEL, SkinDetector
+from video_frames import VIDEO_DECODING_AVAILABLE, is_video, keyframes
+from lazy_imports import lazy_import, module_available
+
+# Optional imports for batched inference; without them the pipeline falls back
+# to AIOrganizer.nsfw_score per file, still spread over the worker pool.
+np = lazy_import("numpy")
+onnxruntime = lazy_import("onnxruntime")
+nudenet_internals = lazy_import("nudenet.nudenet")
+BATCHING_AVAILABLE = NUDENET_AVAILABLE and module_available("numpy", "onnxruntime")
+
+NSFW_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def bounded_map(executor, fn, items, window):
+    """Like executor.map, but keeps at most window calls in flight so results don't pile up in memory."""
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+class NSFWPipeline:
+    """
+    Classifies many files with NudeNet in batches.
+    Images are decoded and preprocessed on a thread pool (OpenCV releases the
+    GIL), stacked into batches and run through one ONNX session tuned for CPU.
+    Decoding of the next batch overlaps with inference of the current one.
+    Videos are scored on a bounded number of low-resolution keyframes, batched
+    through the same session, and stop at the first frame above the threshold.
+    Everything goes through AIOrganizer.nsfw_score on the same pool when
+    NudeNet's internals are unavailable. Without NudeNet, the skin heuristic
+    runs on a SkinDetector process pool instead.
+    With an AICache, files whose content was already scored by the same model
+    are not classified again, and identical files in one run are classified once.
+    """
+    # Scores are written to the cache in batches of this size
+    CACHE_BATCH = 500
+
+    def __init__(self, organizer, batch_size=16, decode_workers=None, intra_op_threads=None,
+                 inter_op_threads=1, threshold=0.5, cache=None, video_frames=VIDEO_KEYFRAMES,
+                 video_batch=4, scene_change=False):
+        cpus = os.cpu_count() or 2
+        self.organizer = organizer
+        self.batch_size = batch_size
+        self.decode_workers = decode_workers or max(1, cpus // 2)
+        self.threshold = threshold
+        self.video_frames = video_frames
+        self.video_batch = video_batch
+        self.scene_change = scene_change
+        self.cache = cache
+        self.model = organizer.nsfw_model
+        self.session = None
+        self.input_name = None
+        self.input_size = None
+        self._read_image = None
+        self._postprocess = None
+
+        detector = organizer.nude_detector
+        if BATCHING_AVAILABLE and detector is not None:
+            try:
+                # NudeNet releases that don't expose these helpers are classified per file
+                self._read_image = nudenet_internals._read_image
+                self._postprocess = nudenet_internals._postprocess
+                self.session = self._tuned_session(detector, intra_op_threads or max(1, cpus - self.decode_workers),
+                                                   inter_op_threads)
+                self.input_name = self.session.get_inputs()[0].name
+                self.input_size = detector.input_width
+            except Exception as e:
+                logging.error(f"Batched NSFW inference unavailable, classifying per file: {e}")
+                self.session = None
+
+    @staticmethod
+    def _tuned_session(detector, intra_op_threads, inter_op_threads):
+        """Recreates the detector's ONNX session with explicit thread counts and full graph optimisation."""
+        model_path = getattr(detector.onnx_session, '_model_path', None)
+        if not model_path:
+            return detector.onnx_session
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return onnxruntime.InferenceSession(model_path, sess_options=options,
+                                            providers=detector.onnx_session.get_providers())
+
+    @property
+    def batched(self):
+        return self.session is not None
+
+    def classify(self, paths, result_callback):
+        """
+        Classifies every path. result_callback(path, unsafe, error) is called
+        from the calling thread once per path, with error None on success.
+        """
+        if self.cache is None:
+            self._score(paths, lambda path, score, error: result_callback(path, score > self.threshold, error))
+            return
+
+        hashes = self.cache.content_hashes(paths)
+        known = self.cache.get_nsfw(hashes.values(), self.model)
+        todo = []
+        # Paths waiting on the result of an identical file that is being classified
+        waiting = {}
+        for path in paths:
+            content_hash = hashes.get(path)
+            if content_hash in known:
+                result_callback(path, known[content_hash] > self.threshold, None)
+            elif content_hash in waiting:
+                waiting[content_hash].append(path)
+            else:
+                if content_hash:
+                    waiting[content_hash] = []
+                todo.append(path)
+        logging.info(f"NSFW: {len(paths) - len(todo)} files answered from cache, {len(todo)} to classify")
+
+        new_scores = []
+
+        def on_score(path, score, error):
+            content_hash = hashes.get(path)
+            for same in [path] + waiting.pop(content_hash, []):
+                result_callback(same, score > self.threshold, error)
+            if error is None and content_hash:
+                new_scores.append((content_hash, score))
+                if len(new_scores) >= self.CACHE_BATCH:
+                    self.cache.put_nsfw(new_scores, self.model)
+                    new_scores.clear()
+
+        self._score(todo, on_score)
+        if new_scores:
+            self.cache.put_nsfw(new_scores, self.model)
+
+    def _score(self, paths, score_callback):
+        """Runs the classifiers; score_callback(path, score, error) is called once per path."""
+        if self.model == SKIN_MODEL and SKIN_DETECTION_AVAILABLE:
+            # No NudeNet: the skin heuristic is CPU bound, so it runs on processes rather than threads
+            SkinDetector().score_many(paths, score_callback)
+            return
+
+        images = [p for p in paths if self.batched and p.lower().endswith(NSFW_IMAGE_EXTENSIONS)]
+        image_set = set(images)
+        others = [p for p in paths if p not in image_set]
+        score_other = self._score_video if self.batched and VIDEO_DECODING_AVAILABLE else self._score_file
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.decode_workers) as executor:
+            if images:
+                self._classify_batched(executor, images, score_callback)
+            for path, future in bounded_map(executor, score_other, others, self.decode_workers * 4):
+                try:
+                    score_callback(path, future.result(), None)
+                except Exception as e:
+                    score_callback(path, 0.0, str(e))
+
+    def _score_file(self, path):
+        return self.organizer.nsfw_score(path, stop_above=self.threshold)
+
+    def _score_video(self, path):
+        """Runs keyframes through the session in small batches, stopping once one crosses the threshold."""
+        if not is_video(path):
+            return self._score_file(path)
+        best = 0.0
+        frames = keyframes(path, self.video_frames, max_side=self.input_size, scene_change=self.scene_change)
+        try:
+            while best <= self.threshold:
+                batch = list(itertools.islice(frames, self.video_batch))
+                if not batch:
+                    break
+                prepared = [self._read_image(frame, self.input_size) for frame in batch]
+                outputs = self.session.run(None, {self.input_name: np.vstack([p[0] for p in prepared])})
+                for j, (_, resize_factor, pad_left, pad_top) in enumerate(prepared):
+                    detections = self._postprocess([outputs[0][j:j + 1]], resize_factor, pad_left, pad_top)
+                    best = max(best, detections_score(detections))
+        finally:
+            # Releases the capture without decoding the remaining frames
+            frames.close()
+        return best
+
+    def _preprocess(self, path):
+        return self._read_image(path, self.input_size)
+
+    def _classify_batched(self, executor, images, score_callback):
+        batch_paths, batch_inputs, batch_meta = [], [], []
+        window = self.batch_size * 2
+        for path, future in bounded_map(executor, self._preprocess, images, window):
+            try:
+                image_data, resize_factor, pad_left, pad_top = future.result()
+            except Exception as e:
+                score_callback(path, 0.0, f"Could not decode: {e}")
+                continue
+            batch_paths.append(path)
+            batch_inputs.append(image_data)
+            batch_meta.append((resize_factor, pad_left, pad_top))
+            if len(batch_paths) >= self.batch_size:
+                self._run_batch(batch_paths, batch_inputs, batch_meta, score_callback)
+                batch_paths, batch_inputs, batch_meta = [], [], []
+        if batch_paths:
+            self._run_batch(batch_paths, batch_inputs, batch_meta, score_callback)
+
+    def _run_batch(self, paths, inputs, meta, score_callback):
+        try:
+            outputs = self.session.run(None, {self.input_name: np.vstack(inputs)})
+        except Exception as e:
+            if len(paths) > 1:
+                # Models exported with a fixed batch dimension only take one image at a time
+                logging.warning(f"Batched inference failed ({e}); continuing with batch size 1")
+                self.batch_size = 1
+                for i in range(len(paths)):
+                    self._run_batch(paths[i:i + 1], inputs[i:i + 1], meta[i:i + 1], score_callback)
+                return
+            score_callback(paths[0], 0.0, f"Inference failed: {e}")
+            return
+        for j, (path, (resize_factor, pad_left, pad_top)) in enumerate(zip(paths, meta)):
+            detections = self._postprocess([outputs[0][j:j + 1]], resize_factor, pad_left, pad_top)
+            score_callback(path, detections_score(detections), None)
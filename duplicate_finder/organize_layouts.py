@@ -0,0 +1,71 @@
+import os
+import re
+from datetime import datetime
+
+# --- Layouts ----------------------------------------------------------------
+# Each layout takes the media kind ("Photos" or "Videos"), the file's MediaInfo
+# (or None) and its mtime, and returns the folder components it belongs in.
+
+_UNSAFE_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def _folder_name(text):
+    return _UNSAFE_CHARS.sub('_', text).strip().rstrip('. ')
+
+
+def by_type(kind, info, mtime):
+    return (kind,)
+
+
+def by_date(kind, info, mtime):
+    """YYYY/MM of the capture time, falling back to the file's mtime."""
+    taken = info.taken if info and info.taken else datetime.fromtimestamp(mtime)
+    return (f"{taken.year:04d}", f"{taken.month:02d}")
+
+
+def by_camera(kind, info, mtime):
+    make = (info.make or "") if info else ""
+    model = (info.model or "") if info else ""
+    # Models usually repeat the make ("Canon" + "Canon EOS R5")
+    name = model if make and model.lower().startswith(make.lower()) else f"{make} {model}"
+    return (_folder_name(name) or "Unknown Camera",)
+
+
+ORGANIZE_LAYOUTS = {
+    'type': by_type,
+    'date': by_date,
+    'camera': by_camera,
+}
+
+# Layouts that need capture metadata read from the files
+METADATA_LAYOUTS = {'date', 'camera'}
+
+
+class OrganizeLayout:
+    """
+    Maps media files to destination folders from a spec such as "type/date"
+    (Photos/2023/07) or "camera/date". Components are applied in order.
+    """
+    def __init__(self, spec="type"):
+        self.names = [name.strip() for name in spec.split('/') if name.strip()]
+        if not self.names:
+            raise ValueError("Empty organize layout")
+        for name in self.names:
+            if name not in ORGANIZE_LAYOUTS:
+                raise ValueError(f"Unknown organize layout '{name}'. Available: {', '.join(sorted(ORGANIZE_LAYOUTS))}")
+        self.spec = "/".join(self.names)
+
+    @property
+    def needs_metadata(self):
+        return any(name in METADATA_LAYOUTS for name in self.names)
+
+    @property
+    def fixed_roots(self):
+        """Top-level destination folders known up front, which the organize walk can skip."""
+        return ("Photos", "Videos") if self.names[0] == 'type' else ()
+
+    def target_dir(self, root, kind, info, mtime):
+        parts = []
+        for name in self.names:
+            parts.extend(ORGANIZE_LAYOUTS[name](kind, info, mtime))
+        return os.path.join(root, *parts)
@@ -0,0 +1,174 @@
+import sqlite3
+import logging
+from face_clustering import FaceClusterIndex, NOISE, encoding_matrix
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+
+class PersonIndex:
+    """
+    Persistent face clusters ("persons").
+    Every indexed face is stored with the content hash of its image, its
+    encoding and its person label, and every person with the centroid of
+    its faces. Opening the index restores the clustering instead of
+    recomputing it, and labels never change between runs, so person
+    folders can be maintained over time.
+    update() only processes images whose content hash is not indexed yet.
+    Their faces are matched to the nearest person centroid first (one small
+    matrix product against all persons), then to the nearest face of a
+    person; the rest are clustered with earlier unmatched faces and may
+    form new persons.
+    """
+    # Faces per distance product against the centroids
+    QUERY_CHUNK = 1024
+
+    def __init__(self, db_path="person_index.db", model="", eps=0.5, min_samples=2):
+        self.db_path = db_path
+        self.model = model
+        self.eps = eps
+        self.index = FaceClusterIndex(eps=eps, min_samples=min_samples)
+        # Content hash of the image each index row came from
+        self.row_hashes = []
+        self._rows_by_hash = {}
+        # Per person: sum of its encodings and number of faces
+        self._sums = {}
+        self._counts = {}
+        self.init_db()
+        self.load()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def init_db(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS faces (
+                model TEXT,
+                row INTEGER,
+                hash TEXT,
+                label INTEGER,
+                core INTEGER,
+                encoding BLOB,
+                PRIMARY KEY (model, row)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS persons (
+                model TEXT,
+                label INTEGER,
+                face_count INTEGER,
+                centroid BLOB,
+                PRIMARY KEY (model, label)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def load(self):
+        conn = self._connect()
+        faces = conn.execute('SELECT hash, label, core, encoding FROM faces WHERE model = ? ORDER BY row',
+                             (self.model,)).fetchall()
+        persons = conn.execute('SELECT label, face_count, centroid FROM persons WHERE model = ?',
+                               (self.model,)).fetchall()
+        conn.close()
+
+        matrix = np.frombuffer(b"".join(face[3] for face in faces), dtype=np.float32).reshape(-1, 128)
+        self.index.load(matrix, [face[1] for face in faces], [bool(face[2]) for face in faces])
+        self.row_hashes = [face[0] for face in faces]
+        self._rows_by_hash = {}
+        for row, content_hash in enumerate(self.row_hashes):
+            self._rows_by_hash.setdefault(content_hash, []).append(row)
+        for label, count, centroid in persons:
+            self._counts[label] = count
+            self._sums[label] = np.frombuffer(centroid, dtype=np.float32).astype(np.float64) * count
+        logging.info(f"Person index: {len(faces)} faces of {len(self._rows_by_hash)} images, {len(persons)} persons")
+
+    def __contains__(self, content_hash):
+        return content_hash in self._rows_by_hash
+
+    def labels_of(self, content_hash):
+        """Returns the person labels of an indexed image's faces, without NOISE."""
+        return {int(self.index.labels[row]) for row in self._rows_by_hash.get(content_hash, ())} - {NOISE}
+
+    def persons(self):
+        """Returns {label: face count}."""
+        return dict(self._counts)
+
+    def update(self, faces):
+        """
+        Adds the faces of images that are not indexed yet and saves the changes.
+        faces: {content hash: [encoding, ...]}. Returns the number of faces added.
+        """
+        new_hashes, new_encodings = [], []
+        for content_hash, encodings in faces.items():
+            if content_hash in self._rows_by_hash:
+                continue
+            self._rows_by_hash[content_hash] = []
+            for encoding in encodings:
+                new_hashes.append(content_hash)
+                new_encodings.append(encoding)
+        if not new_encodings:
+            return 0
+
+        first = len(self.index)
+        old_labels, old_core = self.index.labels.copy(), self.index.core.copy()
+        matrix = encoding_matrix(new_encodings)
+        labels = self._nearest_centroid(matrix)
+        matched = labels != NOISE
+        self.index.assign(matrix[matched], labels[matched])
+        self.index.add(matrix[~matched])
+        for row, content_hash in enumerate([h for h, m in zip(new_hashes, matched) if m] +
+                                           [h for h, m in zip(new_hashes, matched) if not m], first):
+            self.row_hashes.append(content_hash)
+            self._rows_by_hash[content_hash].append(row)
+        logging.info(f"Person index: {len(matrix)} new faces, {int(matched.sum())} matched by centroid")
+
+        # Rows that joined a person: the new ones and earlier noise that formed new persons
+        labels = self.index.labels
+        joined = np.concatenate([np.flatnonzero((old_labels == NOISE) & (labels[:first] != NOISE)),
+                                 np.flatnonzero(labels[first:] != NOISE) + first])
+        touched = set()
+        for label in np.unique(labels[joined]).tolist():
+            rows = joined[labels[joined] == label]
+            self._sums[label] = self._sums.get(label, 0) + self.index.matrix[rows].sum(0, dtype=np.float64)
+            self._counts[label] = self._counts.get(label, 0) + len(rows)
+            touched.add(label)
+
+        changed = np.flatnonzero((old_labels != labels[:first]) | (old_core != self.index.core[:first]))
+        self._save(first, changed, touched)
+        return len(matrix)
+
+    def _nearest_centroid(self, matrix):
+        """Returns the label of the nearest person centroid within eps per face, NOISE where there is none."""
+        labels = np.full(len(matrix), NOISE, dtype=np.int64)
+        if not self._counts:
+            return labels
+        person_labels = np.array(list(self._counts), dtype=np.int64)
+        centroids = np.array([self._sums[label] / self._counts[label] for label in person_labels], dtype=np.float32)
+        centroid_sq = (centroids ** 2).sum(1)
+        for start in range(0, len(matrix), self.QUERY_CHUNK):
+            chunk = matrix[start:start + self.QUERY_CHUNK]
+            sq = (chunk ** 2).sum(1)[:, None] - 2 * chunk @ centroids.T + centroid_sq[None, :]
+            best = sq.argmin(1)
+            close = sq[np.arange(len(chunk)), best] <= self.eps ** 2
+            labels[start:start + len(chunk)][close] = person_labels[best[close]]
+        return labels
+
+    def _save(self, first, changed_rows, touched_labels):
+        index = self.index
+        conn = self._connect()
+        conn.executemany('INSERT OR REPLACE INTO faces (model, row, hash, label, core, encoding) '
+                         'VALUES (?, ?, ?, ?, ?, ?)',
+                         ((self.model, row, self.row_hashes[row], int(index.labels[row]), int(index.core[row]),
+                           index.matrix[row].tobytes()) for row in range(first, len(index))))
+        conn.executemany('UPDATE faces SET label = ?, core = ? WHERE model = ? AND row = ?',
+                         ((int(index.labels[row]), int(index.core[row]), self.model, int(row))
+                          for row in changed_rows))
+        conn.executemany('INSERT OR REPLACE INTO persons (model, label, face_count, centroid) VALUES (?, ?, ?, ?)',
+                         ((self.model, label, self._counts[label],
+                           (self._sums[label] / self._counts[label]).astype(np.float32).tobytes())
+                          for label in touched_labels))
+        conn.commit()
+        conn.close()
@@ -0,0 +1,392 @@
+import os
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex
+
+
+class _Group:
+    """
+    One duplicate group as held by the model.
+    File rows are not objects; per-file check states live in a bytearray.
+    """
+    __slots__ = ('row', 'hash', 'size', 'files', 'mtimes', 'checks', 'checked_count')
+
+    def __init__(self, row, group):
+        self.row = row
+        self.hash = group.get('hash')
+        self.size = group['size']
+        self.files = list(group['files'])
+        self.mtimes = list(group.get('mtimes') or [])
+        self.checks = bytearray(len(self.files))
+        self.checked_count = 0
+
+    @property
+    def wasted(self):
+        return self.size * (len(self.files) - 1)
+
+
+class DuplicateResultsModel(QAbstractItemModel):
+    """
+    Two-level model (group -> files) over the scanner's result dicts.
+    Group rows are exposed to the view in pages through canFetchMore/fetchMore,
+    so attaching a result set with millions of files does not create any rows up front.
+    """
+    COLUMNS = ["File", "Size", "Path"]
+    FETCH_BATCH = 1000
+    # Above this many emptied groups, remove_files resets the model instead of removing rows one by one
+    TARGETED_REMOVE_LIMIT = 50
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._groups = []
+        self._loaded = 0
+        self._sort_column = None
+        self._sort_order = Qt.SortOrder.DescendingOrder
+
+    # --- Loading -----------------------------------------------------------
+
+    def set_results(self, duplicates):
+        self.beginResetModel()
+        self._groups = [_Group(i, g) for i, g in enumerate(duplicates)]
+        self._loaded = 0
+        self._resort()
+        self.endResetModel()
+
+    def append_groups(self, duplicates):
+        """
+        Appends groups streamed in during a scan.
+        New groups go to the end; the current sort is re-applied when the scan finishes.
+        """
+        start = len(self._groups)
+        self._groups.extend(_Group(start + i, g) for i, g in enumerate(duplicates))
+        # Show the first page straight away; later pages are fetched as the view scrolls
+        if self._loaded == start and self._loaded < self.FETCH_BATCH:
+            self.fetchMore(QModelIndex())
+
+    def resort(self):
+        if self._sort_column is not None:
+            self.sort(self._sort_column, self._sort_order)
+
+    def clear(self):
+        self.set_results([])
+
+    def canFetchMore(self, parent):
+        if parent.isValid():
+            return False
+        return self._loaded < len(self._groups)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        remaining = len(self._groups) - self._loaded
+        count = min(self.FETCH_BATCH, remaining)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    # --- Qt model interface ------------------------------------------------
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, None)
+        group = self._groups[parent.row()]
+        return self.createIndex(row, column, group)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        group = index.internalPointer()
+        if group is None:
+            return QModelIndex()
+        return self.createIndex(group.row, 0, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return self._loaded
+        if parent.internalPointer() is not None or parent.column() != 0:
+            return 0
+        return len(self._groups[parent.row()].files)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._groups)
+        return parent.internalPointer() is None and parent.column() == 0
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        group = index.internalPointer()
+        column = index.column()
+
+        if group is None:
+            group = self._groups[index.row()]
+            if role == Qt.ItemDataRole.DisplayRole:
+                if column == 0:
+                    return f"Duplicate Group ({len(group.files)} files)"
+                if column == 1:
+                    return self._format_size(group.size)
+            elif role == Qt.ItemDataRole.CheckStateRole and column == 0:
+                return self._group_check_state(group)
+            elif role == Qt.ItemDataRole.ToolTipRole:
+                return f"Wasted space: {self._format_size(group.wasted)}"
+            return None
+
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return os.path.basename(group.files[row])
+            if column == 1:
+                return self._format_size(group.size)
+            if column == 2:
+                return group.files[row]
+        elif role == Qt.ItemDataRole.CheckStateRole and column == 0:
+            return Qt.CheckState.Checked if group.checks[row] else Qt.CheckState.Unchecked
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            return group.files[row]
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole or index.column() != 0:
+            return False
+        checked = Qt.CheckState(value) == Qt.CheckState.Checked
+        group = index.internalPointer()
+
+        if group is None:
+            # Group checkbox toggles every file in the group
+            group = self._groups[index.row()]
+            self._set_group_checks(group, bytearray([checked]) * len(group.files))
+            return True
+
+        row = index.row()
+        if bool(group.checks[row]) != checked:
+            group.checks[row] = checked
+            group.checked_count += 1 if checked else -1
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+            group_index = self.createIndex(group.row, 0, None)
+            self.dataChanged.emit(group_index, group_index, [Qt.ItemDataRole.CheckStateRole])
+        return True
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        old_groups = list(self._groups)
+        self._sort_column = column
+        self._sort_order = order
+        self._resort()
+        # Remap persistent indexes (selection, current item) to the new group rows
+        from_list = []
+        to_list = []
+        for old_row, group in enumerate(old_groups):
+            if old_row == group.row:
+                continue
+            for col in range(self.columnCount()):
+                from_list.append(self.createIndex(old_row, col, None))
+                to_list.append(self.createIndex(group.row, col, None))
+        self.changePersistentIndexList(from_list, to_list)
+        self.layoutChanged.emit()
+
+    # --- Convenience API used by the UI -----------------------------------
+
+    def group_count(self):
+        return len(self._groups)
+
+    def file_count(self):
+        return sum(len(g.files) for g in self._groups)
+
+    def file_path(self, index):
+        """Returns the file path for a file row, or None for a group row."""
+        if not index.isValid():
+            return None
+        group = index.internalPointer()
+        if group is None:
+            return None
+        return group.files[index.row()]
+
+    def group_files(self, row):
+        return self._groups[row].files
+
+    def group_hash(self, index):
+        """Returns the content hash of the group that the index belongs to."""
+        if not index.isValid():
+            return None
+        group = index.internalPointer()
+        if group is None:
+            group = self._groups[index.row()]
+        return group.hash
+
+    def checked_files(self):
+        """Yields (path, size) for every checked file."""
+        for group in self._groups:
+            if not group.checked_count:
+                continue
+            for path, checked in zip(group.files, group.checks):
+                if checked:
+                    yield path, group.size
+
+    def checked_pairs(self):
+        """
+        Yields (kept_path, checked_path) for every checked file whose group
+        still has an unchecked file to link to.
+        """
+        for group in self._groups:
+            if not group.checked_count or group.checked_count == len(group.files):
+                continue
+            keep = group.files[group.checks.index(0)]
+            for path, checked in zip(group.files, group.checks):
+                if checked:
+                    yield keep, path
+
+    def set_group_checks(self, row, checks):
+        """Replaces the check states of one group with a bytearray of 0/1 values."""
+        self._set_group_checks(self._groups[row], checks)
+
+    def groups_snapshot(self):
+        """Returns the groups as scanner-style result dicts, in row order, for use by worker threads."""
+        return [{'hash': g.hash, 'size': g.size, 'files': list(g.files), 'mtimes': list(g.mtimes)}
+                for g in self._groups]
+
+    def apply_selection(self, selections):
+        """
+        Replaces the check states of every group at once.
+        Change signals are only emitted for groups the view has fetched.
+        """
+        for group, checks in zip(self._groups, selections):
+            group.checks = bytearray(checks)
+            group.checked_count = sum(group.checks)
+        if not self._loaded:
+            return
+        self.dataChanged.emit(self.createIndex(0, 0, None), self.createIndex(self._loaded - 1, 0, None),
+                              [Qt.ItemDataRole.CheckStateRole])
+        for group in self._groups[:self._loaded]:
+            if group.files:
+                self.dataChanged.emit(self.createIndex(0, 0, group),
+                                      self.createIndex(len(group.files) - 1, 0, group),
+                                      [Qt.ItemDataRole.CheckStateRole])
+
+    def remove_files(self, paths):
+        """
+        Drops deleted files from their groups in place instead of rescanning.
+        Groups left with fewer than two files are removed.
+        """
+        removed = set(paths)
+        if not removed:
+            return
+
+        emptied = []
+        for group in self._groups:
+            keep = [i for i, path in enumerate(group.files) if path not in removed]
+            if len(keep) == len(group.files):
+                continue
+            if len(keep) < 2:
+                emptied.append(group)
+            else:
+                self._remove_children(group, keep)
+
+        if not emptied:
+            return
+        if len(emptied) > self.TARGETED_REMOVE_LIMIT:
+            # Row-by-row removal renumbers every following group, so rebuild instead
+            emptied = set(id(g) for g in emptied)
+            self.beginResetModel()
+            self._groups = [g for g in self._groups if id(g) not in emptied]
+            for row, group in enumerate(self._groups):
+                group.row = row
+            self._loaded = 0
+            self.endResetModel()
+            return
+
+        for group in reversed(emptied):
+            row = group.row
+            visible = row < self._loaded
+            if visible:
+                self.beginRemoveRows(QModelIndex(), row, row)
+            del self._groups[row]
+            for later in self._groups[row:]:
+                later.row -= 1
+            if visible:
+                self._loaded -= 1
+                self.endRemoveRows()
+
+    # --- Internals ---------------------------------------------------------
+
+    def _remove_children(self, group, keep):
+        keep = set(keep)
+        # Contiguous ranges of removed rows, processed back to front
+        ranges = []
+        for i in range(len(group.files)):
+            if i in keep:
+                continue
+            if ranges and ranges[-1][1] == i - 1:
+                ranges[-1][1] = i
+            else:
+                ranges.append([i, i])
+
+        visible = group.row < self._loaded
+        parent = self.createIndex(group.row, 0, None)
+        for start, end in reversed(ranges):
+            if visible:
+                self.beginRemoveRows(parent, start, end)
+            del group.files[start:end + 1]
+            del group.mtimes[start:end + 1]
+            del group.checks[start:end + 1]
+            if visible:
+                self.endRemoveRows()
+        group.checked_count = sum(group.checks)
+        if visible:
+            self.dataChanged.emit(parent, self.createIndex(group.row, self.columnCount() - 1, None))
+
+    def _set_group_checks(self, group, checks):
+        group.checks = bytearray(checks)
+        group.checked_count = sum(group.checks)
+        if group.row >= self._loaded:
+            return
+        group_index = self.createIndex(group.row, 0, None)
+        self.dataChanged.emit(group_index, group_index, [Qt.ItemDataRole.CheckStateRole])
+        if group.files:
+            first = self.createIndex(0, 0, group)
+            last = self.createIndex(len(group.files) - 1, 0, group)
+            self.dataChanged.emit(first, last, [Qt.ItemDataRole.CheckStateRole])
+
+    def _resort(self):
+        if self._sort_column is None:
+            return
+        reverse = self._sort_order == Qt.SortOrder.DescendingOrder
+        if self._sort_column == 0:
+            key = lambda g: len(g.files)
+        elif self._sort_column == 1:
+            # Sorting by size orders groups by the space they waste
+            key = lambda g: g.wasted
+        else:
+            key = lambda g: g.files[0] if g.files else ""
+        self._groups.sort(key=key, reverse=reverse)
+        for row, group in enumerate(self._groups):
+            group.row = row
+
+    @staticmethod
+    def _group_check_state(group):
+        if group.checked_count == 0:
+            return Qt.CheckState.Unchecked
+        if group.checked_count == len(group.files):
+            return Qt.CheckState.Checked
+        return Qt.CheckState.PartiallyChecked
+
+    @staticmethod
+    def _format_size(size):
+        return f"{size / 1024:.2f} KB"
@@ -3,72 +3,62 @@ import hashlib
 import concurrent.futures
 from collections import defaultdict
 import logging
+from media_inventory import MediaInventory
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class DuplicateScanner:
     def __init__(self):
         self.files_by_size = defaultdict(list)
+        self.file_mtimes = {}
         self.duplicates = []
         self.scanned_files_count = 0
 
-    def scan_directory(self, path, progress_callback=None):
+    def scan_directory(self, path, progress_callback=None, group_callback=None, bytes_callback=None,
+                       inventory=None):
         """
         Scans the directory for files and groups them by (size, extension).
         Skips offline (cloud) files and executables.
+        See find_duplicates for group_callback and bytes_callback.
+        inventory: a MediaInventory of path shared with other stages of a job;
+        files are grouped as its walk finds them. By default path is walked here.
         """
         self.files_by_size.clear()
+        self.file_mtimes.clear()
         self.duplicates.clear()
         self.scanned_files_count = 0
         
         logging.info(f"Starting scan of {path}")
-        
-        # Windows File Attribute Constant for "Offline"
-        FILE_ATTRIBUTE_OFFLINE = 0x1000
-        
+        inventory = inventory or MediaInventory(path)
+
         try:
-            for root, _, files in os.walk(path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        # Skip symbolic links
-                        if os.path.islink(file_path):
-                            continue
-                        
-                        # Skip executables
-                        if file.lower().endswith('.exe'):
-                            continue
+            for entry in inventory.stream():
+                # Skip executables
+                if entry.name.lower().endswith('.exe'):
+                    continue
 
-                        # Check file attributes for "Offline" status (iCloud/OneDrive placeholders)
-                        try:
-                            # os.stat(path).st_file_attributes is available on Windows Python
-                            attrs = os.stat(file_path).st_file_attributes
-                            if attrs & FILE_ATTRIBUTE_OFFLINE:
-                                logging.info(f"Skipping offline file: {file_path}")
-                                continue
-                        except AttributeError:
-                            # Non-Windows or older Python might not have st_file_attributes
-                            pass
-                            
-                        size = os.path.getsize(file_path)
-                        _, ext = os.path.splitext(file)
-                        ext = ext.lower()
-                        
-                        # Group by (size, extension) tuple
-                        # We only care if there's more than one file of this exact size AND type
-                        self.files_by_size[(size, ext)].append(file_path)
-                        self.scanned_files_count += 1
-                        
-                        if progress_callback and self.scanned_files_count % 100 == 0:
-                            progress_callback(self.scanned_files_count)
-                            
-                    except OSError as e:
-                        logging.warning(f"Could not access {file_path}: {e}")
+                # Skip offline files (iCloud/OneDrive placeholders)
+                if entry.offline:
+                    logging.info(f"Skipping offline file: {entry.path}")
+                    continue
+
+                _, ext = os.path.splitext(entry.name)
+                ext = ext.lower()
+
+                # Group by (size, extension) tuple
+                # We only care if there's more than one file of this exact size AND type
+                self.files_by_size[(entry.size, ext)].append(entry.path)
+                # The mtime is kept so later selection passes don't re-stat
+                self.file_mtimes[entry.path] = entry.mtime
+                self.scanned_files_count += 1
+
+                if progress_callback and self.scanned_files_count % 100 == 0:
+                    progress_callback(self.scanned_files_count)
         except Exception as e:
             logging.error(f"Error scanning directory: {e}")
 
         logging.info(f"Found {self.scanned_files_count} files. Grouping by size and type...")
-        return self.find_duplicates(progress_callback)
+        return self.find_duplicates(progress_callback, group_callback, bytes_callback)
 
     def get_partial_hash(self, file_path, chunk_size=4096):
         """
@@ -97,21 +87,29 @@ class DuplicateScanner:
         except OSError:
             return None
 
-    def find_duplicates(self, progress_callback=None):
+    def find_duplicates(self, progress_callback=None, group_callback=None, bytes_callback=None):
         """
         Identifies duplicates from the size-grouped files using a multi-stage hashing strategy.
+        group_callback(groups) receives each batch of confirmed groups as soon as it is known.
+        bytes_callback(done, total) reports hashing progress in bytes; files ruled out by
+        the partial hash count as done with their full size.
         """
-        potential_duplicates = [paths for paths in self.files_by_size.values() if len(paths) > 1]
+        potential_duplicates = [(key[0], paths) for key, paths in self.files_by_size.items() if len(paths) > 1]
         
         logging.info(f"Processing {len(potential_duplicates)} groups of potential duplicates.")
         
         final_duplicates = []
+        total_bytes = sum(size * len(paths) for size, paths in potential_duplicates)
+        done_bytes = 0
+        if bytes_callback:
+            bytes_callback(done_bytes, total_bytes)
         
         # Stage 2: Partial Hash
         # We can parallelize this part
         with concurrent.futures.ThreadPoolExecutor() as executor:
-            for paths in potential_duplicates:
+            for size, paths in potential_duplicates:
                 hashes = defaultdict(list)
+                new_groups = []
                 
                 # Helper to process a single file for partial hash
                 def process_partial(path):
@@ -125,7 +123,9 @@ class DuplicateScanner:
                 
                 # Stage 3: Full Hash for those with matching partial hashes
                 for p_hash, p_paths in hashes.items():
-                    if len(p_paths) > 1:
+                    if len(p_paths) == 1:
+                        done_bytes += size
+                    else:
                         full_hashes = defaultdict(list)
                         
                         # Helper for full hash
@@ -135,16 +135,28 @@ class DuplicateScanner:
                         full_results = executor.map(process_full, p_paths)
                         
                         for path, full_hash in full_results:
+                            done_bytes += size
                             if full_hash:
                                 full_hashes[full_hash].append(path)
                         
                         for f_hash, f_paths in full_hashes.items():
                             if len(f_paths) > 1:
-                                final_duplicates.append({
+                                new_groups.append({
                                     'hash': f_hash,
-                                    'size': os.path.getsize(f_paths[0]),
-                                    'files': f_paths
+                                    'size': size,
+                                    'files': f_paths,
+                                    'mtimes': [self.file_mtimes.get(p) for p in f_paths]
                                 })
+
+                # Files that failed to open in the partial stage still count as processed
+                done_bytes += size * (len(paths) - sum(len(p) for p in hashes.values()))
+
+                if new_groups:
+                    final_duplicates.extend(new_groups)
+                    if group_callback:
+                        group_callback(new_groups)
+                if bytes_callback:
+                    bytes_callback(done_bytes, total_bytes)
         
         self.duplicates = final_duplicates
         logging.info(f"Scan complete. Found {len(self.duplicates)} groups of duplicates.")
@@ -0,0 +1,91 @@
+import os
+import logging
+import concurrent.futures
+from video_frames import is_video, sample_frames
+from lazy_imports import lazy_import, module_available
+
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+SKIN_DETECTION_AVAILABLE = module_available("cv2", "numpy")
+
+# Cache key for scores from this heuristic; bump when its output changes
+SKIN_MODEL = "skin/2"
+# Flag an image if more than this fraction of it is skin-coloured
+SKIN_THRESHOLD = 0.30
+# Skin tone range in HSV
+LOWER_SKIN = (0, 20, 70)
+UPPER_SKIN = (20, 255, 255)
+
+
+def skin_fraction(image):
+    """Fraction of a BGR image's pixels that fall in the skin tone range."""
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, np.array(LOWER_SKIN, dtype=np.uint8), np.array(UPPER_SKIN, dtype=np.uint8))
+    return cv2.countNonZero(mask) / mask.size
+
+
+def load_reduced(path):
+    """
+    Decodes an image at a quarter of its size. For JPEG, libjpeg scales
+    during the DCT, so the full-resolution image is never produced.
+    """
+    image = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_4)
+    if image is None:
+        # Formats without reduced decoding support in this OpenCV build
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+    return image
+
+
+def skin_score(path, frames=5):
+    """
+    Returns 1.0 if the image (or any of a few sampled video frames) is mostly
+    skin-coloured, 0.0 otherwise. Video sampling stops at the first flagged frame.
+    """
+    if is_video(path):
+        for frame in sample_frames(path, frames):
+            if skin_fraction(frame) > SKIN_THRESHOLD:
+                return 1.0
+        return 0.0
+    image = load_reduced(path)
+    if image is None:
+        return 0.0
+    return 1.0 if skin_fraction(image) > SKIN_THRESHOLD else 0.0
+
+
+def _score_chunk(paths):
+    """Worker entry point: scores a chunk of paths, returning (path, score, error) tuples."""
+    # One OpenCV thread per process; the pool provides the parallelism
+    cv2.setNumThreads(1)
+    results = []
+    for path in paths:
+        try:
+            results.append((path, skin_score(path), None))
+        except Exception as e:
+            results.append((path, 0.0, str(e)))
+    return results
+
+
+class SkinDetector:
+    """
+    Runs the skin heuristic over many files on a process pool. Paths are sent
+    in chunks so per-task overhead stays small next to the decode work.
+    """
+    def __init__(self, max_workers=None, chunk_size=32):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def score_many(self, paths, score_callback):
+        """score_callback(path, score, error) is called from the calling thread once per path."""
+        chunks = [paths[i:i + self.chunk_size] for i in range(0, len(paths), self.chunk_size)]
+        if not chunks:
+            return
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(_score_chunk, chunk): chunk for chunk in chunks}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logging.error(f"Skin detection worker failed: {e}")
+                    results = [(path, 0.0, str(e)) for path in futures[future]]
+                for path, score, error in results:
+                    score_callback(path, score, error)
@@ -1,8 +1,10 @@
 import os
 import shutil
 import unittest
+from datetime import datetime
 from pathlib import Path
 from consolidator import MediaConsolidator
+from journal import MoveJournal
 
 class TestMediaConsolidator(unittest.TestCase):
     def remove_long_path(self, path):
@@ -44,9 +46,10 @@ class TestMediaConsolidator(unittest.TestCase):
         
         self.consolidator = MediaConsolidator()
 
-    def create_file(self, path):
+    def create_file(self, path, content=None):
+        # Distinct content per path unless given, so consolidation does not skip files as duplicates
         with open(path, 'w') as f:
-            f.write("content")
+            f.write(content if content is not None else f"content of {path}")
 
     def tearDown(self):
         if self.test_dir.exists():
@@ -134,5 +137,98 @@ class TestMediaConsolidator(unittest.TestCase):
         
         print("Organization Passed.")
 
+    def test_consolidation_plans_unique_names(self):
+        # Same folder name and file name in two places must not collide at the target
+        (self.test_dir / "Backup" / "Vacation").mkdir(parents=True)
+        self.create_file(self.test_dir / "Backup" / "Vacation" / "img1.jpg")
+
+        files_moved, _ = self.consolidator.consolidate_drive(str(self.test_dir))
+
+        vacation = self.test_dir / "ConsolidatedMedia" / "Vacation"
+        self.assertEqual(files_moved, 4)
+        self.assertEqual(sorted(os.listdir(vacation)), ["img1.jpg", "img1_1.jpg", "img2.jpg"])
+        self.assertFalse((self.test_dir / "Backup" / "Vacation" / "img1.jpg").exists())
+
+    def test_dry_run_resume_and_undo(self):
+        journal = MoveJournal(str(self.test_dir / "journal.db"))
+
+        # Dry run plans everything but moves nothing
+        plan = self.consolidator.consolidate_drive(str(self.test_dir), dry_run=True, journal=journal)
+        self.assertEqual(len(plan), 3)
+        self.assertFalse((self.test_dir / "ConsolidatedMedia").exists())
+        run = journal.incomplete_runs("consolidate")[0]
+        self.assertEqual(run['status'], "planned")
+
+        # Simulate a crash after one move that was never checked off
+        first = journal.entries(run['id'])[0][1]
+        os.makedirs(os.path.dirname(first.target))
+        os.rename(first.source, first.target)
+
+        files_moved, _ = MediaConsolidator().resume_run(journal, run['id'])
+        self.assertEqual(files_moved, 2)
+        self.assertEqual(journal.get_run(run['id'])['status'], "completed")
+        self.assertEqual(len(journal.entries(run['id'], done=True)), 3)
+        self.assertFalse((self.test_dir / "Photos" / "Vacation" / "img1.jpg").exists())
+
+        # Undo puts every file back where it came from
+        MediaConsolidator().undo_run(journal, run['id'])
+        self.assertTrue((self.test_dir / "Photos" / "Vacation" / "img1.jpg").exists())
+        self.assertTrue((self.test_dir / "Photos" / "Vacation" / "img2.jpg").exists())
+        self.assertTrue((self.test_dir / "Downloads" / "img3.png").exists())
+        self.assertEqual(journal.get_run(run['id'])['status'], "undone")
+
+    def test_identical_media_is_skipped(self):
+        (self.test_dir / "Backup").mkdir()
+        self.create_file(self.test_dir / "Backup" / "copy_of_img1.jpg", "same bytes")
+        self.create_file(self.test_dir / "Photos" / "Vacation" / "img1.jpg", "same bytes")
+        (self.test_dir / "ConsolidatedMedia" / "Old").mkdir(parents=True)
+        self.create_file(self.test_dir / "ConsolidatedMedia" / "Old" / "already.png", f"content of {self.test_dir / 'Downloads' / 'img3.png'}")
+
+        journal = MoveJournal(str(self.test_dir / "journal.db"))
+        files_moved, _ = self.consolidator.consolidate_drive(str(self.test_dir), journal=journal)
+
+        # img2 and one of the two identical jpgs move; the other jpg and img3 (already consolidated) stay
+        self.assertEqual(files_moved, 2)
+        self.assertTrue((self.test_dir / "Downloads" / "img3.png").exists())
+        remaining = [(self.test_dir / "Backup" / "copy_of_img1.jpg").exists(),
+                     (self.test_dir / "Photos" / "Vacation" / "img1.jpg").exists()]
+        self.assertEqual(sorted(remaining), [False, True])
+        run = journal.get_runs("consolidate")[0]
+        self.assertEqual(len(journal.get_skipped(run['id'])), 2)
+
+    def test_organize_removes_only_emptied_folders(self):
+        (self.test_dir / "Downloads" / "Day1").mkdir()
+        self.create_file(self.test_dir / "Downloads" / "Day1" / "clip.mp4")
+        self.create_file(self.test_dir / "Downloads" / "Day1" / "._clip.mp4")
+        (self.test_dir / "Documents" / "Scans").mkdir()
+        self.create_file(self.test_dir / "Documents" / "Scans" / "scan.jpg")
+
+        self.consolidator.organize_folder(str(self.test_dir))
+
+        self.assertTrue((self.test_dir / "Videos" / "clip.mp4").exists())
+        self.assertTrue((self.test_dir / "Photos" / "img3.png").exists())
+        # Emptied by the run, including the parent emptied by removing Day1
+        self.assertFalse((self.test_dir / "Downloads").exists())
+        self.assertFalse((self.test_dir / "Documents" / "Scans").exists())
+        # Still holds a non-media file
+        self.assertTrue((self.test_dir / "Documents" / "doc.txt").exists())
+        # Root-level Photos is a destination and is not walked
+        self.assertTrue((self.test_dir / "Photos" / "Vacation" / "img1.jpg").exists())
+    def test_organize_by_date_layout(self):
+        july = datetime(2021, 7, 14).timestamp()
+        os.utime(self.test_dir / "Downloads" / "img3.png", (july, july))
+        (self.test_dir / "2021" / "07").mkdir(parents=True)
+        self.create_file(self.test_dir / "2021" / "07" / "placed.jpg")
+        os.utime(self.test_dir / "2021" / "07" / "placed.jpg", (july, july))
+
+        plan, _, _ = self.consolidator.plan_organize(os.path.abspath(self.test_dir), "date")
+        # Files already in their YYYY/MM folder are not moved
+        self.assertNotIn("placed.jpg", [os.path.basename(entry.source) for entry in plan])
+
+        MediaConsolidator().organize_folder(str(self.test_dir), layout="date")
+        self.assertTrue((self.test_dir / "2021" / "07" / "img3.png").exists())
+        self.assertTrue((self.test_dir / "2021" / "07" / "placed.jpg").exists())
+        self.assertFalse((self.test_dir / "Downloads").exists())
+
 if __name__ == '__main__':
     unittest.main()
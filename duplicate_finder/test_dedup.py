@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from dedup import Deduplicator
+from database import HistoryManager
+
+class TestDeduplicator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.keep = os.path.join(self.tmp.name, "keep.jpg")
+        self.copy = os.path.join(self.tmp.name, "copy.jpg")
+        self.other = os.path.join(self.tmp.name, "other.jpg")
+        for path, content in ((self.keep, "content A"), (self.copy, "content A"), (self.other, "content B")):
+            with open(path, 'w') as f:
+                f.write(content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hardlink_replaces_identical_file(self):
+        replaced, reclaimed, errors = Deduplicator('hardlink').run([(self.keep, self.copy)])
+        self.assertEqual(errors, [])
+        self.assertEqual(replaced, [(self.keep, self.copy, 9)])
+        self.assertEqual(reclaimed, 9)
+        self.assertTrue(os.path.samefile(self.keep, self.copy))
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["copy.jpg", "keep.jpg", "other.jpg"])
+
+        # Already linked files are left alone
+        replaced, reclaimed, errors = Deduplicator('hardlink').run([(self.keep, self.copy)])
+        self.assertEqual(reclaimed, 0)
+
+    def test_differing_file_is_not_replaced(self):
+        replaced, reclaimed, errors = Deduplicator('hardlink').run([(self.keep, self.other)])
+        self.assertEqual(replaced, [])
+        self.assertEqual(len(errors), 1)
+        self.assertFalse(os.path.samefile(self.keep, self.other))
+        with open(self.other) as f:
+            self.assertEqual(f.read(), "content B")
+
+    def test_replacements_are_logged(self):
+        history = HistoryManager(os.path.join(self.tmp.name, "history.db"))
+        history.log_replacements([(self.keep, self.copy, 9)], 'hardlink')
+        records = history.get_replacement_history()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['files_replaced'], 1)
+        self.assertEqual(records[0]['space_recovered'], 9)
+
+if __name__ == '__main__':
+    unittest.main()
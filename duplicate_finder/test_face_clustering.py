@@ -0,0 +1,41 @@
+import unittest
+from face_clustering import CLUSTERING_AVAILABLE, NOISE
+
+if CLUSTERING_AVAILABLE:
+    import numpy as np
+    from face_clustering import FaceClusterIndex, cluster_dbscan
+
+
+@unittest.skipUnless(CLUSTERING_AVAILABLE, "numpy/scipy/scikit-learn not installed")
+class TestFaceClustering(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.centres = self.rng.normal(size=(3, 128)).astype(np.float32) * 2
+
+    def faces(self, person, count):
+        return self.centres[person] + self.rng.normal(scale=0.01, size=(count, 128)).astype(np.float32)
+
+    def test_dbscan_separates_people_and_noise(self):
+        matrix = np.vstack([self.faces(0, 20), self.faces(1, 30), self.rng.normal(size=(1, 128)) * 5])
+        labels, core = cluster_dbscan(matrix.astype(np.float32), eps=0.5, min_samples=2, chunk_size=7)
+        self.assertEqual(len(set(labels[:20])), 1)
+        self.assertEqual(len(set(labels[20:50])), 1)
+        self.assertNotEqual(labels[0], labels[20])
+        self.assertEqual(labels[50], NOISE)
+        self.assertTrue(core[:50].all())
+
+    def test_incremental_assignment_keeps_labels(self):
+        index = FaceClusterIndex()
+        first = index.add(np.vstack([self.faces(0, 10), self.faces(1, 10)]))
+        person0, person1 = first[0], first[10]
+
+        # New photos of known people join their clusters; a new person gets a new label
+        later = index.add(np.vstack([self.faces(1, 3), self.faces(0, 2), self.faces(2, 4)]))
+        self.assertEqual(later[:3].tolist(), [person1] * 3)
+        self.assertEqual(later[3:5].tolist(), [person0] * 2)
+        self.assertEqual(len(set(later[5:].tolist())), 1)
+        self.assertNotIn(later[5], (person0, person1, NOISE))
+        self.assertEqual(index.labels[:20].tolist(), first.tolist())
+
+if __name__ == '__main__':
+    unittest.main()
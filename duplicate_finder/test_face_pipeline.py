@@ -0,0 +1,25 @@
+import os
+import struct
+import tempfile
+import unittest
+from face_pipeline import FacePipeline, _reduction
+
+
+class TestFacePipeline(unittest.TestCase):
+    def test_reduction_keeps_detection_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            factors = {}
+            for width, height in ((800, 600), (2048, 1536), (4000, 3000), (12000, 9000)):
+                path = os.path.join(tmp, f"{width}.png")
+                with open(path, 'wb') as f:
+                    f.write(b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', width, height))
+                factors[width] = _reduction(path, 1024)
+            self.assertEqual(factors, {800: 1, 2048: 2, 4000: 2, 12000: 8})
+            # Unknown formats are decoded at full size
+            self.assertEqual(_reduction(os.path.join(tmp, "missing.jpg"), 1024), 1)
+
+    def test_no_paths_starts_no_workers(self):
+        self.assertEqual(list(FacePipeline().iter_encodings([])), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import struct
+import tempfile
+import unittest
+from keep_policy import KeepPolicyEngine, parse_policy
+from media_metadata import get_image_size
+
+class TestKeepPolicy(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "ConsolidatedMedia", "Vacation"))
+        os.makedirs(os.path.join(self.root, "Backup", "Old", "Deep"))
+        self.catalog = os.path.join(self.root, "ConsolidatedMedia", "Vacation", "img.jpg")
+        self.backup = os.path.join(self.root, "Backup", "img.jpg")
+        self.deep = os.path.join(self.root, "Backup", "Old", "Deep", "img.jpg")
+        for path in (self.catalog, self.backup, self.deep):
+            with open(path, 'w') as f:
+                f.write("content")
+        self.groups = [{
+            'hash': 'h1',
+            'size': 7,
+            'files': [self.deep, self.catalog, self.backup],
+            'mtimes': [100.0, 300.0, 200.0]
+        }]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_oldest_and_newest(self):
+        plan = KeepPolicyEngine("oldest").plan(self.groups)
+        self.assertEqual(plan.keep, [self.deep])
+        self.assertEqual(list(plan.selections[0]), [0, 1, 1])
+
+        plan = KeepPolicyEngine("newest").plan(self.groups)
+        self.assertEqual(plan.keep, [self.catalog])
+        self.assertEqual(plan.bytes_reclaimed, 14)
+
+    def test_path_rules_and_tie_breaking(self):
+        plan = KeepPolicyEngine("in_catalog").plan(self.groups)
+        self.assertEqual(plan.keep, [self.catalog])
+
+        # Both Backup files match the prefix; the shorter path breaks the tie
+        backup_dir = os.path.join(self.root, "Backup")
+        plan = KeepPolicyEngine(f"prefer_path:{backup_dir},shortest_path").plan(self.groups)
+        self.assertEqual(plan.keep, [self.backup])
+        self.assertEqual(sorted(p for p, _ in plan.delete), sorted([self.deep, self.catalog]))
+
+    def test_missing_mtimes_are_statted(self):
+        os.utime(self.backup, (50, 50))
+        groups = [dict(self.groups[0], mtimes=[])]
+        plan = KeepPolicyEngine("oldest").plan(groups)
+        self.assertEqual(plan.keep, [self.backup])
+
+    def test_parse_policy(self):
+        self.assertEqual(parse_policy("prefer_path:/a|/b, oldest"), [('prefer_path', '/a|/b'), ('oldest', None)])
+        with self.assertRaises(ValueError):
+            parse_policy("biggest_smile")
+
+    def test_image_size_from_png_header(self):
+        path = os.path.join(self.root, "tiny.png")
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n' + struct.pack('>I', 13) + b'IHDR' + struct.pack('>II', 640, 480) + b'\x08\x02\x00\x00\x00')
+        self.assertEqual(get_image_size(path), (640, 480))
+        self.assertIsNone(get_image_size(self.backup))
+
+if __name__ == '__main__':
+    unittest.main()
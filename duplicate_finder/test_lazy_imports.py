@@ -0,0 +1,24 @@
+import sys
+import unittest
+from lazy_imports import lazy_import, module_available
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_module_available(self):
+        self.assertTrue(module_available("json", "sqlite3"))
+        self.assertFalse(module_available("json", "no_such_module_xyz"))
+
+    def test_import_is_deferred_until_first_use(self):
+        sys.modules.pop("colorsys", None)
+        colorsys = lazy_import("colorsys")
+        self.assertNotIn("colorsys", sys.modules)
+        self.assertEqual(colorsys.rgb_to_hsv(1.0, 0.0, 0.0), (0.0, 1.0, 1.0))
+        self.assertIn("colorsys", sys.modules)
+
+    def test_missing_module_fails_on_use(self):
+        missing = lazy_import("no_such_module_xyz")
+        with self.assertRaises(ImportError):
+            missing.anything
+
+if __name__ == '__main__':
+    unittest.main()
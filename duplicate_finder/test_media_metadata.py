@@ -0,0 +1,78 @@
+import os
+import struct
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from media_metadata import get_media_info, MediaInfo
+from metadata_extractor import MetadataCache, MetadataExtractor
+
+
+def tiff_block(make, model, taken):
+    """Big-endian TIFF with Make/Model in IFD0 and DateTimeOriginal in the Exif IFD."""
+    make, model, taken = make.encode() + b'\x00', model.encode() + b'\x00', taken.encode() + b'\x00'
+    ifd0_offset = 8
+    exif_offset = ifd0_offset + 2 + 3 * 12 + 4
+    data_offset = exif_offset + 2 + 1 * 12 + 4
+    ifd0 = struct.pack('>H', 3)
+    ifd0 += struct.pack('>HHII', 0x010F, 2, len(make), data_offset)
+    ifd0 += struct.pack('>HHII', 0x0110, 2, len(model), data_offset + len(make))
+    ifd0 += struct.pack('>HHII', 0x8769, 4, 1, exif_offset) + b'\x00' * 4
+    exif = struct.pack('>H', 1) + struct.pack('>HHII', 0x9003, 2, len(taken), data_offset + len(make) + len(model))
+    exif += b'\x00' * 4
+    return b'MM\x00*' + struct.pack('>I', ifd0_offset) + ifd0 + exif + make + model + taken
+
+
+def atom(kind, payload):
+    return struct.pack('>I', len(payload) + 8) + kind + payload
+
+
+class TestMediaMetadata(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_jpeg_exif(self):
+        app1 = b'Exif\x00\x00' + tiff_block("Canon", "Canon EOS R5", "2021:07:14 09:30:00")
+        jpeg = b'\xff\xd8' + b'\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1 + b'\xff\xda' + b'\x00' * 64
+        info = get_media_info(self.write("a.jpg", jpeg))
+        self.assertEqual(info, MediaInfo(datetime(2021, 7, 14, 9, 30), "Canon", "Canon EOS R5"))
+
+        # No EXIF before the image data
+        self.assertEqual(get_media_info(self.write("b.jpg", b'\xff\xd8\xff\xda' + b'\x00' * 64)), None)
+
+    def test_quicktime_header(self):
+        seconds = int((datetime(2020, 1, 2, 3, 4, 5) - datetime(1904, 1, 1)).total_seconds())
+        mvhd = atom(b'mvhd', b'\x00\x00\x00\x00' + struct.pack('>II', seconds, seconds) + b'\x00' * 88)
+        make = atom(b'\xa9mak', struct.pack('>HH', 5, 0) + b'Apple')
+        moov = atom(b'moov', mvhd + atom(b'udta', make))
+        # Sample data comes before the movie header, as in most camera files
+        data = atom(b'ftyp', b'isom\x00\x00\x02\x00') + atom(b'mdat', b'\x00' * 4096) + moov
+        info = get_media_info(self.write("clip.mp4", data))
+        self.assertEqual(info, MediaInfo(datetime(2020, 1, 2, 3, 4, 5), "Apple", None))
+
+    def test_cache_skips_unchanged_files(self):
+        path = self.write("c.png", b'\x89PNG\r\n\x1a\n' + atom(b'IEND', b''))
+        st = os.stat(path)
+        cache = MetadataCache(os.path.join(self.tmp.name, "cache.db"))
+        items = [(path, st.st_size, st.st_mtime)]
+
+        self.assertEqual(MetadataExtractor(cache).extract(items), {path: None})
+        with patch('metadata_extractor.get_media_info', return_value=None) as parse:
+            self.assertEqual(MetadataExtractor(cache).extract(items), {path: None})
+            parse.assert_not_called()
+
+            # A changed mtime invalidates the entry
+            MetadataExtractor(cache).extract([(path, st.st_size, st.st_mtime + 1)])
+            parse.assert_called_once_with(path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+import concurrent.futures
+from name_allocator import UniqueNameAllocator
+
+class TestUniqueNameAllocator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        for name in ("IMG_0001.jpg", "IMG_0001_2.jpg"):
+            with open(os.path.join(self.dir, name), 'w') as f:
+                f.write("x")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_skips_existing_and_allocated_names(self):
+        allocator = UniqueNameAllocator()
+        names = [allocator.allocate(self.dir, "IMG_0001.jpg") for _ in range(3)]
+        self.assertEqual(names, ["IMG_0001_1.jpg", "IMG_0001_3.jpg", "IMG_0001_4.jpg"])
+        self.assertEqual(allocator.allocate(self.dir, "other.png"), "other.png")
+        self.assertEqual(allocator.allocate(self.dir, "other.png"), "other_1.png")
+
+    def test_missing_directory_starts_empty(self):
+        allocator = UniqueNameAllocator()
+        target = os.path.join(self.dir, "not_created_yet")
+        self.assertEqual(allocator.allocate(target, "a.jpg"), "a.jpg")
+        self.assertEqual(allocator.allocate(target, "a.jpg"), "a_1.jpg")
+
+    def test_concurrent_allocations_are_unique(self):
+        allocator = UniqueNameAllocator()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            names = list(executor.map(lambda _: allocator.allocate(self.dir, "IMG_0001.jpg"), range(500)))
+        self.assertEqual(len(set(names)), 500)
+        self.assertNotIn("IMG_0001.jpg", names)
+        self.assertNotIn("IMG_0001_2.jpg", names)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from ai_cache import AICache
+from nsfw_pipeline import NSFWPipeline
+
+
+class FakeOrganizer:
+    nude_detector = None
+    nsfw_model = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def nsfw_score(self, path, stop_above=0.5):
+        self.calls.append(path)
+        if path.endswith(".bad"):
+            raise ValueError("unreadable")
+        return 0.9 if "nsfw" in path else 0.1
+
+
+class TestNSFWPipeline(unittest.TestCase):
+    def test_fallback_reports_every_file(self):
+        paths = [f"/photos/img{i}.jpg" for i in range(50)] + ["/photos/nsfw.jpg", "/videos/nsfw.mp4", "/x.bad"]
+        results = {}
+        pipeline = NSFWPipeline(FakeOrganizer(), decode_workers=3)
+        pipeline.classify(paths, lambda path, unsafe, error: results.setdefault(path, (unsafe, error)))
+
+        self.assertFalse(pipeline.batched)
+        self.assertEqual(set(results), set(paths))
+        self.assertEqual(sorted(p for p, (unsafe, _) in results.items() if unsafe), ["/photos/nsfw.jpg", "/videos/nsfw.mp4"])
+        self.assertEqual(results["/x.bad"], (False, "unreadable"))
+
+    def test_cache_skips_known_and_identical_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name, content in (("a_nsfw.jpg", "x"), ("b.jpg", "x"), ("c.jpg", "y")):
+                paths.append(os.path.join(tmp, name))
+                with open(paths[-1], 'w') as f:
+                    f.write(content)
+            cache = AICache(os.path.join(tmp, "ai_cache.db"))
+
+            organizer = FakeOrganizer()
+            results = {}
+            NSFWPipeline(organizer, cache=cache).classify(paths, lambda p, unsafe, e: results.__setitem__(p, unsafe))
+            # b.jpg has a_nsfw.jpg's content, so it shares its result without being classified
+            self.assertEqual(sorted(organizer.calls), [paths[0], paths[2]])
+            self.assertEqual(results, {paths[0]: True, paths[1]: True, paths[2]: False})
+
+            # A renamed file is answered from the cache too
+            renamed = os.path.join(tmp, "renamed.jpg")
+            os.rename(paths[2], renamed)
+            organizer = FakeOrganizer()
+            results = {}
+            NSFWPipeline(organizer, cache=cache).classify([paths[0], paths[1], renamed],
+                                                          lambda p, unsafe, e: results.__setitem__(p, unsafe))
+            self.assertEqual(organizer.calls, [])
+            self.assertEqual(results, {paths[0]: True, paths[1]: True, renamed: False})
+
+if __name__ == '__main__':
+    unittest.main()
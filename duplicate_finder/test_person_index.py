@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+from face_clustering import CLUSTERING_AVAILABLE, NOISE
+
+if CLUSTERING_AVAILABLE:
+    import numpy as np
+    from person_index import PersonIndex
+
+
+@unittest.skipUnless(CLUSTERING_AVAILABLE, "numpy/scipy/scikit-learn not installed")
+class TestPersonIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "persons.db")
+        self.rng = np.random.default_rng(0)
+        self.centres = self.rng.normal(size=(3, 128)).astype(np.float32) * 2
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def photos(self, person, count, prefix):
+        """{hash: [encoding]} for count single-face photos of a person."""
+        return {f"{prefix}{i}": [self.centres[person] + self.rng.normal(scale=0.01, size=128).astype(np.float32)]
+                for i in range(count)}
+
+    def test_labels_survive_reopening(self):
+        index = PersonIndex(self.db_path, model="test")
+        self.assertEqual(index.update({**self.photos(0, 5, "a"), **self.photos(1, 5, "b")}), 10)
+        person_a, = index.labels_of("a0")
+        person_b, = index.labels_of("b0")
+        self.assertNotEqual(person_a, person_b)
+
+        reopened = PersonIndex(self.db_path, model="test")
+        self.assertEqual(reopened.labels_of("a3"), {person_a})
+        self.assertEqual(reopened.persons(), {person_a: 5, person_b: 5})
+
+        # Known images are skipped; new photos join existing persons or form new ones
+        added = reopened.update({"a0": [self.centres[0]], **self.photos(1, 2, "c"), **self.photos(2, 3, "d")})
+        self.assertEqual(added, 5)
+        self.assertEqual(reopened.labels_of("c1"), {person_b})
+        person_d, = reopened.labels_of("d0")
+        self.assertNotIn(person_d, (person_a, person_b, NOISE))
+
+        final = PersonIndex(self.db_path, model="test")
+        self.assertEqual(final.labels_of("d2"), {person_d})
+        self.assertEqual(final.persons()[person_b], 7)
+        self.assertEqual(final.labels_of("a0"), {person_a})
+
+    def test_models_are_kept_apart(self):
+        PersonIndex(self.db_path, model="test").update(self.photos(0, 3, "a"))
+        self.assertNotIn("a0", PersonIndex(self.db_path, model="other"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -49,5 +49,22 @@ def test_scanner():
     assert len(duplicates[0]['files']) == 3
     print("Test Passed!")
 
+def test_scanner_streams_groups():
+    base_path = "test_duplicates_stream"
+    create_dummy_files(base_path)
+
+    streamed = []
+    progress = []
+    scanner = DuplicateScanner()
+    duplicates = scanner.scan_directory(base_path, group_callback=streamed.extend,
+                                        bytes_callback=lambda done, total: progress.append((done, total)))
+    shutil.rmtree(base_path)
+
+    # Every confirmed group is streamed, and progress ends at the full byte count
+    assert streamed == duplicates
+    assert progress[-1][0] == progress[-1][1] == 5 * len("content A")
+    print("Test Passed!")
+
 if __name__ == "__main__":
     test_scanner()
+    test_scanner_streams_groups()
@@ -0,0 +1,29 @@
+import os
+import tempfile
+import unittest
+from skin_detection import SKIN_DETECTION_AVAILABLE, SkinDetector
+
+if SKIN_DETECTION_AVAILABLE:
+    import cv2
+    import numpy as np
+
+
+@unittest.skipUnless(SKIN_DETECTION_AVAILABLE, "opencv not installed")
+class TestSkinDetection(unittest.TestCase):
+    def test_process_pool_scores_images(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            skin = os.path.join(tmp, "skin.jpg")
+            sky = os.path.join(tmp, "sky.png")
+            cv2.imwrite(skin, np.full((800, 600, 3), (120, 160, 220), dtype=np.uint8))
+            cv2.imwrite(sky, np.full((800, 600, 3), (230, 120, 20), dtype=np.uint8))
+            broken = os.path.join(tmp, "broken.jpg")
+            with open(broken, 'w') as f:
+                f.write("not an image")
+
+            results = {}
+            SkinDetector(max_workers=2, chunk_size=1).score_many(
+                [skin, sky, broken], lambda path, score, error: results.__setitem__(path, score))
+            self.assertEqual(results, {skin: 1.0, sky: 0.0, broken: 0.0})
+
+if __name__ == '__main__':
+    unittest.main()
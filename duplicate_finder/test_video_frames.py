@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from video_frames import VIDEO_DECODING_AVAILABLE, keyframes
+
+if VIDEO_DECODING_AVAILABLE:
+    import cv2
+    import numpy as np
+
+
+@unittest.skipUnless(VIDEO_DECODING_AVAILABLE, "opencv not installed")
+class TestVideoFrames(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "clip.avi")
+        writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (640, 480))
+        # Two scenes: 50 dark frames, then 50 bright red ones
+        for i in range(100):
+            writer.write(np.full((480, 640, 3), (0, 0, 255) if i >= 50 else (30, 30, 30), dtype=np.uint8))
+        writer.release()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_even_frames_are_bounded_and_downscaled(self):
+        frames = list(keyframes(self.path, count=4, max_side=160))
+        self.assertEqual(len(frames), 4)
+        self.assertEqual(frames[0].shape[:2], (120, 160))
+
+    def test_scene_change_keeps_the_cut(self):
+        frames = list(keyframes(self.path, count=2, max_side=160, scene_change=True))
+        self.assertEqual(len(frames), 2)
+        # One frame from each scene
+        self.assertLess(frames[0].mean(), 50)
+        self.assertGreater(frames[1][..., 2].mean(), 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import logging
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+PREVIEW_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp', '.tiff')
+
+
+def is_previewable(path):
+    return path.lower().endswith(PREVIEW_EXTENSIONS)
+
+
+class _ThumbnailSignals(QObject):
+    loaded = pyqtSignal(str, QImage)
+    failed = pyqtSignal(str, str)
+
+
+class _ThumbnailJob(QRunnable):
+    """
+    Decodes one thumbnail on a pool thread.
+    Only QImage is used here; QPixmap may only be created on the GUI thread.
+    """
+    def __init__(self, key, path, size, disk_path, signals):
+        super().__init__()
+        self.key = key
+        self.path = path
+        self.size = size
+        self.disk_path = disk_path
+        self.signals = signals
+
+    def run(self):
+        if self.disk_path and os.path.exists(self.disk_path):
+            image = QImage(self.disk_path)
+            if not image.isNull():
+                self.signals.loaded.emit(self.key, image)
+                return
+
+        reader = QImageReader(self.path)
+        reader.setAutoTransform(True)
+        original = reader.size()
+        if original.isValid() and (original.width() > self.size.width() or original.height() > self.size.height()):
+            # Let the decoder scale while reading (JPEG decodes at 1/2, 1/4, 1/8 directly)
+            reader.setScaledSize(original.scaled(self.size, Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            self.signals.failed.emit(self.key, reader.errorString())
+            return
+
+        if self.disk_path:
+            try:
+                os.makedirs(os.path.dirname(self.disk_path), exist_ok=True)
+                image.save(self.disk_path, "PNG")
+            except OSError as e:
+                logging.warning(f"Could not write thumbnail cache {self.disk_path}: {e}")
+        self.signals.loaded.emit(self.key, image)
+
+
+class ThumbnailService(QObject):
+    """
+    Produces preview thumbnails off the GUI thread.
+    Decoded pixmaps are kept in an in-memory LRU. When a content hash is known,
+    thumbnails are keyed by it (identical files share one entry) and can also be
+    persisted in disk_cache_dir so later sessions skip decoding entirely.
+    """
+    thumbnail_ready = pyqtSignal(str, QPixmap)
+    thumbnail_failed = pyqtSignal(str, str)
+
+    def __init__(self, thumb_size=QSize(512, 512), max_items=256, disk_cache_dir=None, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.thumb_size = thumb_size
+        self.max_items = max_items
+        self.disk_cache_dir = disk_cache_dir
+        self._cache = OrderedDict()
+        self._pending = set()
+        self._pool = QThreadPool(self)
+        if max_threads:
+            self._pool.setMaxThreadCount(max_threads)
+        self._signals = _ThumbnailSignals()
+        self._signals.loaded.connect(self._on_loaded)
+        self._signals.failed.connect(self._on_failed)
+
+    def cache_key(self, path, content_hash=None):
+        return content_hash or path
+
+    def get(self, key):
+        """Returns the cached pixmap for key, or None."""
+        pixmap = self._cache.get(key)
+        if pixmap is not None:
+            self._cache.move_to_end(key)
+        return pixmap
+
+    def request(self, path, content_hash=None):
+        """
+        Returns (key, pixmap) if the thumbnail is cached, otherwise (key, None)
+        and schedules a decode; thumbnail_ready(key, pixmap) is emitted when done.
+        """
+        key = self.cache_key(path, content_hash)
+        pixmap = self.get(key)
+        if pixmap is None:
+            self._schedule(key, path, content_hash)
+        return key, pixmap
+
+    def prefetch(self, paths, content_hash=None):
+        for path in paths:
+            if is_previewable(path):
+                key = self.cache_key(path, content_hash)
+                if key not in self._cache:
+                    self._schedule(key, path, content_hash)
+
+    def clear_pending(self):
+        """Drops decodes that have not started yet, e.g. when a new scan begins."""
+        self._pool.clear()
+        self._pending.clear()
+
+    def _schedule(self, key, path, content_hash):
+        if key in self._pending:
+            return
+        self._pending.add(key)
+        job = _ThumbnailJob(key, path, self.thumb_size, self._disk_path(content_hash), self._signals)
+        self._pool.start(job)
+
+    def _disk_path(self, content_hash):
+        if not self.disk_cache_dir or not content_hash:
+            return None
+        name = f"{content_hash}_{self.thumb_size.width()}x{self.thumb_size.height()}.png"
+        return os.path.join(self.disk_cache_dir, content_hash[:2], name)
+
+    def _on_loaded(self, key, image):
+        self._pending.discard(key)
+        pixmap = QPixmap.fromImage(image)
+        self._cache[key] = pixmap
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_items:
+            self._cache.popitem(last=False)
+        self.thumbnail_ready.emit(key, pixmap)
+
+    def _on_failed(self, key, error):
+        self._pending.discard(key)
+        self.thumbnail_failed.emit(key, error)
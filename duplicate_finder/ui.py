@@ -1,6 +1,9 @@
 import sys
 import os
+import time
+import shutil
 import logging
+import concurrent.futures
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QFileDialog, QTreeWidget, QTreeWidgetItem, 
                              QProgressBar, QLabel, QMessageBox, QTabWidget, QHeaderView,
@@ -10,42 +13,133 @@ from PyQt6.QtGui import QPixmap, QIcon
 from scanner import DuplicateScanner
 from database import HistoryManager
 from consolidator import MediaConsolidator
-from ai_organizer import AIOrganizer, NUDENET_AVAILABLE, FACE_RECOGNITION_AVAILABLE
+from ai_organizer import AIOrganizer, NUDENET_AVAILABLE, FACE_RECOGNITION_AVAILABLE, FACE_MODEL
+from face_clustering import CLUSTERING_AVAILABLE
+from person_index import PersonIndex
+from nsfw_pipeline import NSFWPipeline
+from ai_cache import AICache
+from results_model import DuplicateResultsModel
+from thumbnails import ThumbnailService, is_previewable
+from keep_policy import KeepPolicyEngine
+from dedup import Deduplicator, LINK_MODES
+from journal import MoveJournal
+from organize_layouts import OrganizeLayout
+from metadata_extractor import MetadataCache
+import file_ops
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QFileDialog, QTreeWidget, QTreeWidgetItem, 
                              QProgressBar, QLabel, QMessageBox, QTabWidget, QHeaderView,
-                             QSplitter, QListWidget, QListWidgetItem, QTextEdit, QLineEdit)
+                             QSplitter, QListWidget, QListWidgetItem, QTextEdit, QLineEdit,
+                             QTreeView, QComboBox, QCheckBox)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 class ScanThread(QThread):
     progress_update = pyqtSignal(int)
+    groups_found = pyqtSignal(list)
+    bytes_progress = pyqtSignal('qint64', 'qint64')
     scan_complete = pyqtSignal(list)
 
+    # Minimum seconds between partial-result signals so the GUI event loop is not flooded
+    EMIT_INTERVAL = 0.1
+
     def __init__(self, path):
         super().__init__()
         self.path = path
         self.scanner = DuplicateScanner()
+        self._pending_groups = []
+        self._last_groups_emit = 0.0
+        self._last_bytes_emit = 0.0
 
     def run(self):
-        duplicates = self.scanner.scan_directory(self.path, self.progress_update.emit)
+        duplicates = self.scanner.scan_directory(self.path, self.progress_update.emit,
+                                                 group_callback=self.on_groups,
+                                                 bytes_callback=self.on_bytes)
+        self.flush_groups()
         self.scan_complete.emit(duplicates)
 
+    def on_groups(self, groups):
+        self._pending_groups.extend(groups)
+        if time.monotonic() - self._last_groups_emit >= self.EMIT_INTERVAL:
+            self.flush_groups()
+
+    def flush_groups(self):
+        if self._pending_groups:
+            self.groups_found.emit(self._pending_groups)
+            self._pending_groups = []
+        self._last_groups_emit = time.monotonic()
+
+    def on_bytes(self, done, total):
+        now = time.monotonic()
+        if done >= total or now - self._last_bytes_emit >= self.EMIT_INTERVAL:
+            self._last_bytes_emit = now
+            self.bytes_progress.emit(done, total)
+
+class AutoSelectThread(QThread):
+    progress_update = pyqtSignal(int, int)
+    selection_ready = pyqtSignal(list)
+
+    def __init__(self, groups, engine):
+        super().__init__()
+        self.groups = groups
+        self.engine = engine
+
+    def run(self):
+        plan = self.engine.plan(self.groups, self.progress_update.emit)
+        self.selection_ready.emit(plan.selections)
+
+class DeleteThread(QThread):
+    progress_update = pyqtSignal(int, int)
+    delete_complete = pyqtSignal(list, 'qint64')
+
+    def __init__(self, files):
+        super().__init__()
+        self.files = files
+
+    def run(self):
+        deleted, freed, _ = file_ops.delete_files(self.files, progress_callback=self.progress_update.emit)
+        self.delete_complete.emit(deleted, freed)
+
+class LinkThread(QThread):
+    progress_update = pyqtSignal(int, int)
+    link_complete = pyqtSignal(list, 'qint64', list)
+
+    def __init__(self, pairs, mode):
+        super().__init__()
+        self.pairs = pairs
+        self.deduplicator = Deduplicator(mode)
+
+    def run(self):
+        replaced, reclaimed, errors = self.deduplicator.run(self.pairs, self.progress_update.emit)
+        self.link_complete.emit(replaced, reclaimed, errors)
+
 class ConsolidationThread(QThread):
     log_message = pyqtSignal(str)
     finished = pyqtSignal()
 
-    def __init__(self, drive_path, mode="consolidate"):
+    def __init__(self, drive_path, mode="consolidate", dry_run=False, run_id=None, layout="type"):
         super().__init__()
         self.drive_path = drive_path
         self.mode = mode
+        self.dry_run = dry_run
+        self.run_id = run_id
+        self.layout = OrganizeLayout(layout)
         self.consolidator = MediaConsolidator()
 
     def run(self):
+        journal = MoveJournal()
         if self.mode == "consolidate":
-            self.consolidator.consolidate_drive(self.drive_path, log_callback=self.log_message.emit)
+            self.consolidator.consolidate_drive(self.drive_path, log_callback=self.log_message.emit,
+                                                dry_run=self.dry_run, journal=journal)
         elif self.mode == "organize":
-            self.consolidator.organize_folder(self.drive_path, log_callback=self.log_message.emit)
+            metadata_cache = MetadataCache() if self.layout.needs_metadata else None
+            self.consolidator.organize_folder(self.drive_path, log_callback=self.log_message.emit,
+                                              dry_run=self.dry_run, journal=journal, layout=self.layout,
+                                              metadata_cache=metadata_cache)
+        elif self.mode == "resume":
+            self.consolidator.resume_run(journal, self.run_id, log_callback=self.log_message.emit)
+        elif self.mode == "undo":
+            self.consolidator.undo_run(journal, self.run_id, log_callback=self.log_message.emit)
         self.finished.emit()
 
 class AIThread(QThread):
@@ -57,6 +151,7 @@ class AIThread(QThread):
         self.target_folder = target_folder
         self.mode = mode
         self.organizer = AIOrganizer()
+        self.ai_cache = AICache()
 
     def run(self):
         if self.mode == "nsfw":
@@ -71,23 +166,41 @@ class AIThread(QThread):
         if not os.path.exists(restricted_dir):
             os.makedirs(restricted_dir)
 
-        count = 0
+        paths = []
         for root, _, files in os.walk(self.target_folder):
             if "Restricted" in root:
                 continue
             for file in files:
                 if file.lower().endswith(('.jpg', '.jpeg', '.png', '.mp4', '.avi', '.mov')):
-                    path = os.path.join(root, file)
-                    try:
-                        if self.organizer.is_nsfw(path):
-                            # Handle filename collisions
-                            unique_filename = self.organizer.get_unique_filename(restricted_dir, file)
-                            dest_path = os.path.join(restricted_dir, unique_filename)
-                            shutil.move(path, dest_path)
-                            self.log_message.emit(f"Moved NSFW content: {file}")
-                            count += 1
-                    except Exception as e:
-                        self.log_message.emit(f"Error checking {file}: {e}")
+                    paths.append(os.path.join(root, file))
+
+        pipeline = NSFWPipeline(self.organizer, cache=self.ai_cache)
+        self.log_message.emit(f"Classifying {len(paths)} files "
+                              f"({'batched' if pipeline.batched else 'per file'}, {pipeline.decode_workers} workers)...")
+
+        # Flagged files are moved in the background while inference continues
+        moves = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as move_executor:
+            def on_result(path, unsafe, error):
+                file = os.path.basename(path)
+                if error:
+                    self.log_message.emit(f"Error checking {file}: {error}")
+                elif unsafe:
+                    # Handle filename collisions
+                    unique_filename = self.organizer.get_unique_filename(restricted_dir, file)
+                    dest_path = os.path.join(restricted_dir, unique_filename)
+                    moves.append((file, move_executor.submit(shutil.move, path, dest_path)))
+
+            pipeline.classify(paths, on_result)
+
+        count = 0
+        for file, future in moves:
+            try:
+                future.result()
+                self.log_message.emit(f"Moved NSFW content: {file}")
+                count += 1
+            except Exception as e:
+                self.log_message.emit(f"Error moving {file}: {e}")
         
         self.log_message.emit(f"NSFW Scan complete. Moved {count} files.")
 
@@ -96,7 +209,7 @@ class AIThread(QThread):
         self.log_message.emit(f"Scanning faces in {self.target_folder}...")
         
         # Scan for faces and separate family photos
-        face_data, family_photos = self.organizer.scan_faces(self.target_folder)
+        face_data, family_photos = self.organizer.scan_faces(self.target_folder, cache=self.ai_cache)
         self.log_message.emit(f"Found {len(family_photos)} family photos (>3 faces)")
         self.log_message.emit(f"Found faces in {len(face_data)} other images. Grouping...")
         
@@ -108,7 +221,7 @@ class AIThread(QThread):
             
             for path in family_photos:
                 try:
-                    if os.path.exists(path):
+                    if os.path.exists(path) and os.path.dirname(path) != family_dir:
                         filename = self.organizer.get_unique_filename(family_dir, os.path.basename(path))
                         shutil.move(path, os.path.join(family_dir, filename))
                 except Exception as e:
@@ -116,8 +229,10 @@ class AIThread(QThread):
             
             self.log_message.emit(f"Moved {len(family_photos)} photos to Family_Friends")
         
-        # Group remaining faces by person
-        groups = self.organizer.group_faces(face_data)
+        # Group remaining faces by person; the persistent index keeps Person_<label> folders stable across runs
+        person_index = PersonIndex(model=FACE_MODEL) if CLUSTERING_AVAILABLE else None
+        hashes = self.ai_cache.content_hashes(list(face_data)) if person_index is not None else None
+        groups = self.organizer.group_faces(face_data, person_index=person_index, hashes=hashes)
         self.log_message.emit(f"Identified {len(groups)} distinct person groups")
         
         moved_count = 0
@@ -131,7 +246,8 @@ class AIThread(QThread):
                 
                 for path in paths:
                     try:
-                        if os.path.exists(path):  # Check if not already moved
+                        # Skip photos already moved, or filed here by an earlier run
+                        if os.path.exists(path) and os.path.dirname(path) != person_dir:
                             filename = self.organizer.get_unique_filename(person_dir, os.path.basename(path))
                             shutil.move(path, os.path.join(person_dir, filename))
                             moved_count += 1
@@ -146,6 +262,9 @@ class AIThread(QThread):
         self.log_message.emit(f"Face grouping complete. Organized {moved_count} photos into person folders.")
 
 class DuplicateFinderUI(QMainWindow):
+    # Number of following groups whose thumbnails are prefetched on selection
+    PREFETCH_GROUPS = 2
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Duplicate File Finder")
@@ -218,13 +337,19 @@ class DuplicateFinderUI(QMainWindow):
         # Results Area (Splitter for Tree and Preview)
         splitter = QSplitter(Qt.Orientation.Horizontal)
         
-        # Tree Widget
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["File", "Size", "Path"])
-        self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        # Results View (virtualized model, rows are created on demand)
+        self.results_model = DuplicateResultsModel(self)
+        self.tree = QTreeView()
+        self.tree.setModel(self.results_model)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setSortingEnabled(True)
+        self.tree.sortByColumn(1, Qt.SortOrder.DescendingOrder)
+        # ResizeToContents would measure every row, so use interactive sizing instead
+        self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)
         self.tree.header().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        self.tree.itemChanged.connect(self.on_item_changed)
-        self.tree.itemClicked.connect(self.on_item_clicked)
+        self.tree.setColumnWidth(0, 300)
+        self.tree.clicked.connect(self.on_item_clicked)
+        self.results_model.rowsInserted.connect(self.on_rows_fetched)
         splitter.addWidget(self.tree)
 
         # Preview Widget
@@ -234,6 +359,14 @@ class DuplicateFinderUI(QMainWindow):
         self.preview_label.setMinimumWidth(300)
         splitter.addWidget(self.preview_label)
 
+        # Thumbnails are decoded on a worker pool and cached by content hash
+        self.thumbnails = ThumbnailService(
+            disk_cache_dir=os.path.join(os.path.expanduser("~"), ".duplicate_finder", "thumbnails"),
+            parent=self)
+        self.thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
+        self.thumbnails.thumbnail_failed.connect(self.on_thumbnail_failed)
+        self.preview_key = None
+
         layout.addWidget(splitter, 1)
 
         # Bottom Bar: Actions
@@ -242,18 +375,38 @@ class DuplicateFinderUI(QMainWindow):
         delete_btn = QPushButton("Delete Selected")
         delete_btn.clicked.connect(self.delete_selected)
         
-        # Auto-select buttons
+        # Auto-select buttons (select older = keep the newest file, and vice versa)
         select_older_btn = QPushButton("Select Older")
-        select_older_btn.clicked.connect(lambda: self.auto_select('older'))
+        select_older_btn.clicked.connect(lambda: self.auto_select('newest'))
         select_newer_btn = QPushButton("Select Newer")
-        select_newer_btn.clicked.connect(lambda: self.auto_select('newer'))
+        select_newer_btn.clicked.connect(lambda: self.auto_select('oldest'))
+
+        # Free-form keep policy, e.g. "prefer_path:D:\\Photos,oldest,shortest_path"
+        self.policy_input = QLineEdit("in_catalog,oldest,shortest_path")
+        self.policy_input.setToolTip("Comma separated keep policies; files not kept are selected")
+        apply_policy_btn = QPushButton("Apply Keep Policy")
+        apply_policy_btn.clicked.connect(lambda: self.auto_select(self.policy_input.text()))
 
         action_layout.addWidget(self.status_label, 1)
+        action_layout.addWidget(self.policy_input)
+        action_layout.addWidget(apply_policy_btn)
         action_layout.addWidget(select_older_btn)
         action_layout.addWidget(select_newer_btn)
+        # Replace selected files with links to a kept copy instead of deleting them
+        self.link_mode_combo = QComboBox()
+        self.link_mode_combo.addItems(LINK_MODES)
+        link_btn = QPushButton("Link Selected")
+        link_btn.setToolTip("Replace selected files with hardlinks/reflinks to an unselected copy in the same group")
+        link_btn.clicked.connect(self.link_selected)
+
         action_layout.addWidget(delete_btn)
+        action_layout.addWidget(self.link_mode_combo)
+        action_layout.addWidget(link_btn)
         layout.addLayout(action_layout)
 
+        # Buttons disabled while a selection, delete or link worker is running
+        self.result_action_buttons = [apply_policy_btn, select_older_btn, select_newer_btn, delete_btn, link_btn]
+
     def init_history_tab(self):
         layout = QVBoxLayout(self.history_tab)
         self.history_list = QListWidget()
@@ -267,14 +420,22 @@ class DuplicateFinderUI(QMainWindow):
         
         info_label = QLabel("Step 1: Consolidate photos and videos from D: drive to D:\\ConsolidatedMedia.\n"
                             "Files will be grouped by their parent folder name.\n"
+                            "Files whose identical content is already consolidated are left in place.\n"
                             "System folders are excluded. Junk files (._*) will be removed.")
         info_label.setWordWrap(True)
         layout.addWidget(info_label)
 
+        self.consolidate_dry_run = QCheckBox("Dry run (plan only, nothing is moved)")
+        layout.addWidget(self.consolidate_dry_run)
+
         self.consolidate_btn = QPushButton("Start Consolidation (D: Drive)")
         self.consolidate_btn.clicked.connect(self.start_consolidation)
         layout.addWidget(self.consolidate_btn)
 
+        self.consolidate_undo_btn = QPushButton("Undo Last Consolidation")
+        self.consolidate_undo_btn.clicked.connect(lambda: self.start_undo("consolidate"))
+        layout.addWidget(self.consolidate_undo_btn)
+
         self.consolidate_log = QTextEdit()
         self.consolidate_log.setReadOnly(True)
         layout.addWidget(self.consolidate_log)
@@ -282,7 +443,8 @@ class DuplicateFinderUI(QMainWindow):
     def init_organize_tab(self):
         layout = QVBoxLayout(self.organize_tab)
         
-        info_label = QLabel("Step 2: Organize and flatten a folder into 'Photos' and 'Videos'.\n"
+        info_label = QLabel("Step 2: Organize and flatten a folder into 'Photos' and 'Videos', "
+                            "or into folders by capture date or camera.\n"
                             "WARNING: This will remove original subfolders and flatten the structure.")
         info_label.setWordWrap(True)
         layout.addWidget(info_label)
@@ -296,9 +458,27 @@ class DuplicateFinderUI(QMainWindow):
         folder_layout.addWidget(browse_btn)
         layout.addLayout(folder_layout)
         
+        layout_row = QHBoxLayout()
+        layout_row.addWidget(QLabel("Layout:"))
+        self.organize_layout = QComboBox()
+        for label, spec in (("Photos / Videos", "type"),
+                            ("Photos / Videos / Year / Month", "type/date"),
+                            ("Year / Month (capture date)", "date"),
+                            ("Camera / Year / Month", "camera/date")):
+            self.organize_layout.addItem(label, spec)
+        layout_row.addWidget(self.organize_layout)
+        layout.addLayout(layout_row)
+
+        self.organize_dry_run = QCheckBox("Dry run (plan only, nothing is moved)")
+        layout.addWidget(self.organize_dry_run)
+
         self.organize_btn = QPushButton("Start Organization")
         self.organize_btn.clicked.connect(self.start_organization)
         layout.addWidget(self.organize_btn)
+
+        self.organize_undo_btn = QPushButton("Undo Last Organization")
+        self.organize_undo_btn.clicked.connect(lambda: self.start_undo("organize"))
+        layout.addWidget(self.organize_undo_btn)
         
         self.organize_log = QTextEdit()
         self.organize_log.setReadOnly(True)
@@ -395,23 +575,32 @@ class DuplicateFinderUI(QMainWindow):
             QMessageBox.warning(self, "Error", "Target folder does not exist.")
             return
 
-        reply = QMessageBox.question(self, 'Confirm Organization', 
-                                     f"This will FLATTEN files in {target_folder} into Photos/Videos.\n"
-                                     "Original subfolders will be removed.\n"
-                                     "Are you sure?",
-                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
-                                     QMessageBox.StandardButton.No)
-
-        if reply == QMessageBox.StandardButton.Yes:
-            self.organize_btn.setEnabled(False)
-            self.organize_log.clear()
-            self.organize_log.append("Starting organization...")
-            
-            # Reuse thread class but with mode
-            self.organize_thread = ConsolidationThread(target_folder, mode="organize")
-            self.organize_thread.log_message.connect(self.update_organize_log)
-            self.organize_thread.finished.connect(self.organization_finished)
-            self.organize_thread.start()
+        dry_run = self.organize_dry_run.isChecked()
+        run_id = None if dry_run else self.offer_resume("organize", target_folder)
+        if run_id is None and not dry_run:
+            reply = QMessageBox.question(self, 'Confirm Organization', 
+                                         f"This will FLATTEN files in {target_folder} into "
+                                         f"{self.organize_layout.currentText()}.\n"
+                                         "Original subfolders will be removed.\n"
+                                         "Are you sure?",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
+                                         QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+
+        self.organize_btn.setEnabled(False)
+        self.organize_log.clear()
+        self.organize_log.append("Starting organization...")
+        
+        # Reuse thread class but with mode
+        if run_id is not None:
+            self.organize_thread = ConsolidationThread(target_folder, mode="resume", run_id=run_id)
+        else:
+            self.organize_thread = ConsolidationThread(target_folder, mode="organize", dry_run=dry_run,
+                                                       layout=self.organize_layout.currentData())
+        self.organize_thread.log_message.connect(self.update_organize_log)
+        self.organize_thread.finished.connect(self.organization_finished)
+        self.organize_thread.start()
 
     def update_organize_log(self, message):
         self.organize_log.append(message)
@@ -421,26 +610,77 @@ class DuplicateFinderUI(QMainWindow):
         QMessageBox.information(self, "Organization Complete", "File organization finished.")
 
     def start_consolidation(self):
-        reply = QMessageBox.question(self, "Confirm Consolidation", 
-                                     "This will MOVE files on your D: drive. Are you sure?",
-                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        # Hardcoded to D: as per request
+        drive_path = "D:\\"
+        dry_run = self.consolidate_dry_run.isChecked()
+        run_id = None if dry_run else self.offer_resume("consolidate", drive_path)
+        if run_id is None and not dry_run:
+            reply = QMessageBox.question(self, "Confirm Consolidation", 
+                                         "This will MOVE files on your D: drive. Are you sure?",
+                                         QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+
+        self.consolidate_btn.setEnabled(False)
+        self.consolidate_log.clear()
+        self.consolidate_log.append("Starting consolidation...")
         
-        if reply == QMessageBox.StandardButton.Yes:
+        if not os.path.exists(drive_path):
+             self.consolidate_log.append("Error: D: drive not found.")
+             self.consolidate_btn.setEnabled(True)
+             return
+
+        if run_id is not None:
+            self.cons_thread = ConsolidationThread(drive_path, mode="resume", run_id=run_id)
+        else:
+            self.cons_thread = ConsolidationThread(drive_path, dry_run=dry_run)
+        self.cons_thread.log_message.connect(self.update_consolidation_log)
+        self.cons_thread.finished.connect(self.on_consolidation_finished)
+        self.cons_thread.start()
+
+    def offer_resume(self, kind, path):
+        """
+        Asks whether to resume a planned or interrupted run for path.
+        Returns the run id to resume, or None to start a new run.
+        """
+        root = MediaConsolidator().normalize_root(path)
+        runs = MoveJournal().incomplete_runs(kind, root)
+        if not runs:
+            return None
+        run = runs[0]
+        pending = len(MoveJournal().entries(run['id'], done=False))
+        reply = QMessageBox.question(self, "Resume Run",
+                                     f"Run #{run['id']} from {run['created']} ({run['status']}) has {pending} moves left.\n"
+                                     "Resume it instead of starting a new scan?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        return run['id'] if reply == QMessageBox.StandardButton.Yes else None
+
+    def start_undo(self, kind):
+        runs = MoveJournal().get_runs(kind, ("completed",))
+        if not runs:
+            QMessageBox.information(self, "Undo", f"No completed {kind} run to undo.")
+            return
+        run = runs[0]
+        reply = QMessageBox.question(self, "Confirm Undo",
+                                     f"Move the files of run #{run['id']} ({run['created']}) back to where they came from?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        if kind == "consolidate":
             self.consolidate_btn.setEnabled(False)
             self.consolidate_log.clear()
-            self.consolidate_log.append("Starting consolidation...")
-            
-            # Hardcoded to D: as per request
-            drive_path = "D:\\"
-            if not os.path.exists(drive_path):
-                 self.consolidate_log.append("Error: D: drive not found.")
-                 self.consolidate_btn.setEnabled(True)
-                 return
-
-            self.cons_thread = ConsolidationThread(drive_path)
+            self.cons_thread = ConsolidationThread(run['root'], mode="undo", run_id=run['id'])
             self.cons_thread.log_message.connect(self.update_consolidation_log)
             self.cons_thread.finished.connect(self.on_consolidation_finished)
             self.cons_thread.start()
+        else:
+            self.organize_btn.setEnabled(False)
+            self.organize_log.clear()
+            self.organize_thread = ConsolidationThread(run['root'], mode="undo", run_id=run['id'])
+            self.organize_thread.log_message.connect(self.update_organize_log)
+            self.organize_thread.finished.connect(self.organization_finished)
+            self.organize_thread.start()
 
     def update_consolidation_log(self, message):
         self.consolidate_log.append(message)
@@ -462,7 +702,8 @@ class DuplicateFinderUI(QMainWindow):
             return
 
         logging.info(f"UI: Starting scan for path: {path}")
-        self.tree.clear()
+        self.results_model.clear()
+        self.thumbnails.clear_pending()
         self.scan_btn.setEnabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0) # Indeterminate
@@ -470,114 +711,120 @@ class DuplicateFinderUI(QMainWindow):
 
         self.thread = ScanThread(path)
         self.thread.progress_update.connect(self.update_progress)
+        self.thread.groups_found.connect(self.on_groups_found)
+        self.thread.bytes_progress.connect(self.update_bytes_progress)
         self.thread.scan_complete.connect(self.on_scan_complete)
         self.thread.start()
 
     def update_progress(self, count):
         self.status_label.setText(f"Scanned {count} files...")
 
+    def on_groups_found(self, groups):
+        self.results_model.append_groups(groups)
+
+    def update_bytes_progress(self, done, total):
+        # QProgressBar works on 32-bit ints, so report progress in tenths of a percent
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setValue(int(done * 1000 / total) if total else 1000)
+        self.status_label.setText(f"Hashing: {done / (1024 * 1024):.1f} of {total / (1024 * 1024):.1f} MB "
+                                  f"({self.results_model.group_count()} groups found)")
+
     def on_scan_complete(self, duplicates):
         logging.info(f"UI: Scan complete. Received {len(duplicates)} duplicate groups.")
         self.progress_bar.setVisible(False)
         self.scan_btn.setEnabled(True)
         self.status_label.setText(f"Found {len(duplicates)} groups of duplicates.")
-        self.populate_tree(duplicates)
+        # Groups were streamed in during the scan; only the ordering needs refreshing
+        self.results_model.resort()
 
     def populate_tree(self, duplicates):
-        self.tree.clear()
-        for group in duplicates:
-            size_str = f"{group['size'] / 1024:.2f} KB"
-            group_item = QTreeWidgetItem(self.tree)
-            group_item.setText(0, f"Duplicate Group ({len(group['files'])} files)")
-            group_item.setText(1, size_str)
-            group_item.setFlags(group_item.flags() | Qt.ItemFlag.ItemIsAutoTristate | Qt.ItemFlag.ItemIsUserCheckable)
-            group_item.setCheckState(0, Qt.CheckState.Unchecked)
-
-            for file_path in group['files']:
-                file_item = QTreeWidgetItem(group_item)
-                file_item.setText(0, os.path.basename(file_path))
-                file_item.setText(1, size_str)
-                file_item.setText(2, file_path)
-                file_item.setFlags(file_item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-                file_item.setCheckState(0, Qt.CheckState.Unchecked)
-        
-        self.tree.expandAll()
+        self.results_model.set_results(duplicates)
 
-    def on_item_changed(self, item, column):
-        # Handle parent/child checkbox logic if needed (Tristate handles most)
-        pass
+    def on_rows_fetched(self, parent, first, last):
+        # Expand each page of groups as the view fetches it, never the whole result set
+        if parent.isValid():
+            return
+        for row in range(first, last + 1):
+            self.tree.expand(self.results_model.index(row, 0))
 
-    def on_item_clicked(self, item, column):
-        path = item.text(2)
-        logging.info(f"UI: Item clicked. Column: {column}, Path from text(2): '{path}'")
-        
-        if path and os.path.exists(path):
-            if path.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp', '.tiff')):
-                try:
-                    pixmap = QPixmap(path)
-                    if not pixmap.isNull():
-                        logging.info(f"UI: Loaded pixmap for {path}. Size: {pixmap.width()}x{pixmap.height()}")
-                        scaled_pixmap = pixmap.scaled(self.preview_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                        self.preview_label.setPixmap(scaled_pixmap)
-                    else:
-                        logging.error(f"UI: Failed to load pixmap for {path}. Pixmap is null.")
-                        self.preview_label.setText("Invalid Image (Load Failed)")
-                except Exception as e:
-                    logging.error(f"UI: Exception loading image {path}: {e}")
-                    self.preview_label.setText(f"Error loading image: {e}")
-            else:
-                logging.info(f"UI: File extension not supported for preview: {path}")
-                self.preview_label.setText("No preview available (Unsupported Type)")
+    def on_item_clicked(self, index):
+        path = self.results_model.file_path(index)
+        logging.info(f"UI: Item clicked. Column: {index.column()}, Path: '{path}'")
+
+        if not path:
+            logging.info("UI: Clicked item has no path (likely a group header).")
+            return
+        if not is_previewable(path):
+            logging.info(f"UI: File extension not supported for preview: {path}")
+            self.preview_key = None
+            self.preview_label.setText("No preview available (Unsupported Type)")
+            return
+
+        content_hash = self.results_model.group_hash(index)
+        self.preview_key, pixmap = self.thumbnails.request(path, content_hash)
+        if pixmap is not None:
+            self.show_preview(pixmap)
         else:
-            if not path:
-                logging.info("UI: Clicked item has no path (likely a group header).")
-            else:
-                logging.warning(f"UI: Path does not exist: {path}")
-
-    def auto_select(self, criteria):
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            group = root.child(i)
-            files = []
-            for j in range(group.childCount()):
-                item = group.child(j)
-                path = item.text(2)
-                files.append((os.path.getmtime(path), item))
-            
-            if not files:
-                continue
+            self.preview_label.setText("Loading preview...")
+
+        # Prefetch the rest of this group and the first file of the next few groups
+        group_row = index.parent().row()
+        self.thumbnails.prefetch(self.results_model.group_files(group_row), content_hash)
+        last_row = min(group_row + 1 + self.PREFETCH_GROUPS, self.results_model.rowCount())
+        for row in range(group_row + 1, last_row):
+            group_index = self.results_model.index(row, 0)
+            self.thumbnails.prefetch(self.results_model.group_files(row)[:1],
+                                     self.results_model.group_hash(group_index))
+
+    def on_thumbnail_ready(self, key, pixmap):
+        if key == self.preview_key:
+            self.show_preview(pixmap)
+
+    def on_thumbnail_failed(self, key, error):
+        if key == self.preview_key:
+            logging.error(f"UI: Failed to load preview for {key}: {error}")
+            self.preview_label.setText("Invalid Image (Load Failed)")
+
+    def show_preview(self, pixmap):
+        scaled_pixmap = pixmap.scaled(self.preview_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        self.preview_label.setPixmap(scaled_pixmap)
+
+    def set_result_actions_enabled(self, enabled):
+        for button in self.result_action_buttons:
+            button.setEnabled(enabled)
+        self.scan_btn.setEnabled(enabled and self.path_input.text() != "No directory selected")
+
+    def update_operation_progress(self, done, total):
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(done)
+
+    def auto_select(self, policy):
+        if not self.results_model.group_count():
+            return
+        try:
+            engine = KeepPolicyEngine(policy)
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Keep Policy", str(e))
+            return
+        self.set_result_actions_enabled(False)
+        self.progress_bar.setVisible(True)
+        self.status_label.setText("Selecting...")
 
-            files.sort(key=lambda x: x[0]) # Sort by time
-            
-            # Uncheck all first
-            for _, item in files:
-                item.setCheckState(0, Qt.CheckState.Unchecked)
-
-            if criteria == 'older':
-                # Select all except the newest
-                for _, item in files[:-1]:
-                    item.setCheckState(0, Qt.CheckState.Checked)
-            elif criteria == 'newer':
-                # Select all except the oldest
-                for _, item in files[1:]:
-                    item.setCheckState(0, Qt.CheckState.Checked)
+        # The worker uses modification times gathered during the scan
+        self.select_thread = AutoSelectThread(self.results_model.groups_snapshot(), engine)
+        self.select_thread.progress_update.connect(self.update_operation_progress)
+        self.select_thread.selection_ready.connect(self.on_selection_ready)
+        self.select_thread.start()
+
+    def on_selection_ready(self, selections):
+        self.results_model.apply_selection(selections)
+        self.progress_bar.setVisible(False)
+        self.set_result_actions_enabled(True)
+        selected = sum(sum(checks) for checks in selections)
+        self.status_label.setText(f"Selected {selected} files.")
 
     def delete_selected(self):
-        files_to_delete = []
-        space_recovered = 0
-        
-        root = self.tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            group = root.child(i)
-            for j in range(group.childCount()):
-                item = group.child(j)
-                if item.checkState(0) == Qt.CheckState.Checked:
-                    path = item.text(2)
-                    files_to_delete.append(path)
-                    try:
-                        space_recovered += os.path.getsize(path)
-                    except OSError:
-                        pass
+        files_to_delete = list(self.results_model.checked_files())
 
         if not files_to_delete:
             QMessageBox.information(self, "Info", "No files selected.")
@@ -588,34 +835,70 @@ class DuplicateFinderUI(QMainWindow):
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            deleted_files = []
-            total_recovered_bytes = 0
-            for path in files_to_delete:
-                try:
-                    # Get size before deleting to ensure accuracy
-                    size = os.path.getsize(path)
-                    os.remove(path)
-                    deleted_files.append(path)
-                    total_recovered_bytes += size
-                except OSError as e:
-                    print(f"Error deleting {path}: {e}")
-            
-            self.history_manager.log_cleanup(deleted_files, total_recovered_bytes)
-            
-            # Format the size string
-            if total_recovered_bytes < 1024 * 1024:
-                size_str = f"{total_recovered_bytes / 1024:.2f} KB"
-            else:
-                size_str = f"{total_recovered_bytes / (1024 * 1024):.2f} MB"
-            
-            summary_msg = f"Deleted {len(deleted_files)} files.\n{size_str} recovered."
-            self.status_label.setText(summary_msg.replace("\n", " "))
-            
-            # Show message box so user sees it before rescan wipes the status
-            QMessageBox.information(self, "Deletion Complete", summary_msg)
-            
-            self.start_scan() # Rescan to update view
-            self.load_history()
+            self.set_result_actions_enabled(False)
+            self.progress_bar.setVisible(True)
+            self.status_label.setText(f"Deleting {len(files_to_delete)} files...")
+
+            self.delete_thread = DeleteThread(files_to_delete)
+            self.delete_thread.progress_update.connect(self.update_operation_progress)
+            self.delete_thread.delete_complete.connect(self.on_delete_complete)
+            self.delete_thread.start()
+
+    def on_delete_complete(self, deleted_files, total_recovered_bytes):
+        self.progress_bar.setVisible(False)
+        self.set_result_actions_enabled(True)
+        self.history_manager.log_cleanup(deleted_files, total_recovered_bytes)
+
+        # Update the affected groups in place instead of rescanning
+        self.results_model.remove_files(deleted_files)
+
+        # Format the size string
+        if total_recovered_bytes < 1024 * 1024:
+            size_str = f"{total_recovered_bytes / 1024:.2f} KB"
+        else:
+            size_str = f"{total_recovered_bytes / (1024 * 1024):.2f} MB"
+        
+        summary_msg = f"Deleted {len(deleted_files)} files.\n{size_str} recovered."
+        self.status_label.setText(summary_msg.replace("\n", " "))
+        QMessageBox.information(self, "Deletion Complete", summary_msg)
+        self.load_history()
+
+    def link_selected(self):
+        pairs = list(self.results_model.checked_pairs())
+        if not pairs:
+            QMessageBox.information(self, "Info", "No files selected (each group needs one unselected file to keep).")
+            return
+
+        mode = self.link_mode_combo.currentText()
+        reply = QMessageBox.question(self, "Confirm Link",
+                                     f"Replace {len(pairs)} files with {mode}s to the kept copy?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        self.set_result_actions_enabled(False)
+        self.progress_bar.setVisible(True)
+        self.status_label.setText(f"Linking {len(pairs)} files...")
+
+        self.link_thread = LinkThread(pairs, mode)
+        self.link_thread.progress_update.connect(self.update_operation_progress)
+        self.link_thread.link_complete.connect(self.on_link_complete)
+        self.link_thread.start()
+
+    def on_link_complete(self, replaced, reclaimed, errors):
+        self.progress_bar.setVisible(False)
+        self.set_result_actions_enabled(True)
+        mode = self.link_thread.deduplicator.mode
+        self.history_manager.log_replacements(replaced, mode)
+
+        # Linked files no longer waste space, so drop them from their groups
+        self.results_model.remove_files([target for _, target, _ in replaced])
+
+        summary_msg = (f"Replaced {len(replaced)} files with {mode}s.\n"
+                       f"{reclaimed / (1024 * 1024):.2f} MB recovered, {len(errors)} errors.")
+        self.status_label.setText(summary_msg.replace("\n", " "))
+        QMessageBox.information(self, "Linking Complete", summary_msg)
+        self.load_history()
 
     def load_history(self):
         self.history_list.clear()
@@ -626,6 +909,11 @@ class DuplicateFinderUI(QMainWindow):
             space = record['space_recovered'] / (1024 * 1024) # MB
             item = QListWidgetItem(f"{timestamp}: Removed {count} files ({space:.2f} MB)")
             self.history_list.addItem(item)
+        for record in self.history_manager.get_replacement_history():
+            space = record['space_recovered'] / (1024 * 1024) # MB
+            item = QListWidgetItem(f"{record['timestamp']}: Replaced {record['files_replaced']} files "
+                                   f"with {record['mode']}s ({space:.2f} MB)")
+            self.history_list.addItem(item)
 
     def on_tab_change(self, index):
         if index == 1: # History tab
@@ -2,8 +2,8 @@ import sys
 import os
 import unittest
 from unittest.mock import MagicMock, patch
-from PyQt6.QtWidgets import QApplication, QTreeWidgetItem
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import Qt, QModelIndex
 
 # Ensure we can import from the current directory
 sys.path.append(os.getcwd())
@@ -40,21 +40,22 @@ class TestDeletionLogic(unittest.TestCase):
         
         mock_getsize.return_value = 1024 * 1024 # 1 MB per file
         
-        # Populate tree with mock items
-        root = self.ui.tree.invisibleRootItem()
-        group = QTreeWidgetItem(root)
-        group.setText(0, "Group 1")
+        # Populate the results model with a mock group
+        model = self.ui.results_model
+        model.set_results([{
+            'hash': 'abc',
+            'size': 1024 * 1024,
+            'files': ["/path/to/file1.jpg", "/path/to/file2.jpg", "/path/to/file3.jpg"]
+        }])
+        model.fetchMore(QModelIndex())
+        group_index = model.index(0, 0)
+        model.setData(model.index(0, 0, group_index), Qt.CheckState.Checked.value, Qt.ItemDataRole.CheckStateRole)
+        model.setData(model.index(1, 0, group_index), Qt.CheckState.Checked.value, Qt.ItemDataRole.CheckStateRole)
         
-        item1 = QTreeWidgetItem(group)
-        item1.setText(2, "/path/to/file1.jpg")
-        item1.setCheckState(0, Qt.CheckState.Checked)
-        
-        item2 = QTreeWidgetItem(group)
-        item2.setText(2, "/path/to/file2.jpg")
-        item2.setCheckState(0, Qt.CheckState.Checked)
-        
-        # Execute deletion
+        # Execute deletion (runs on a worker thread; wait for it and deliver its signals)
         self.ui.delete_selected()
+        self.ui.delete_thread.wait()
+        QApplication.processEvents()
         
         # Verify os.remove was called
         self.assertEqual(mock_remove.call_count, 2)
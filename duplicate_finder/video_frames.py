@@ -0,0 +1,100 @@
+import logging
+from lazy_imports import lazy_import, module_available
+
+cv2 = lazy_import("cv2")
+VIDEO_DECODING_AVAILABLE = module_available("cv2")
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.wmv', '.flv', '.webm', '.m4v')
+
+
+def is_video(path):
+    return path.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def downscale(frame, max_side):
+    """Shrinks a frame so its longer side is at most max_side; smaller frames are returned as is."""
+    height, width = frame.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return frame
+    return cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+
+def sample_frames(path, count=5, max_side=320):
+    """
+    Yields up to count BGR frames at evenly spaced positions of the video,
+    downscaled to max_side. Each frame is reached by seeking, so the cost
+    does not grow with the length of the video. The first and last 5% are
+    skipped, as they are often black or title cards.
+    Being a generator, callers can stop as soon as they have an answer.
+    """
+    return keyframes(path, count, max_side)
+
+
+def keyframes(path, count=8, max_side=320, scene_change=False):
+    """
+    Yields up to count downscaled BGR frames of the video.
+    By default frames are evenly spaced (see sample_frames). With
+    scene_change, three times as many evenly spaced candidates are decoded
+    and the count frames that differ most from their predecessor are kept,
+    which favours distinct shots over long static ones; the decode cost is
+    still bounded by the candidate count.
+    """
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            logging.warning(f"Could not open video {path}")
+            return
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total <= 0:
+            # Unknown length (some containers); take the first frames instead
+            for _ in range(count):
+                ok, frame = capture.read()
+                if not ok:
+                    return
+                yield downscale(frame, max_side)
+            return
+
+        if not scene_change:
+            for position in _spaced_positions(total, count):
+                frame = _read_at(capture, position)
+                if frame is not None:
+                    yield downscale(frame, max_side)
+            return
+
+        candidates = []
+        for position in _spaced_positions(total, count * 3):
+            frame = _read_at(capture, position)
+            if frame is not None:
+                candidates.append(downscale(frame, max_side))
+        yield from _most_distinct(candidates, count)
+    finally:
+        capture.release()
+
+
+def _spaced_positions(total, count):
+    start, span = total * 0.05, total * 0.9
+    return sorted({int(start + span * (i + 0.5) / count) for i in range(count)})
+
+
+def _read_at(capture, position):
+    # Seeking lands on the preceding keyframe and decodes forward, so each read costs at most one GOP
+    capture.set(cv2.CAP_PROP_POS_FRAMES, position)
+    ok, frame = capture.read()
+    return frame if ok else None
+
+
+def _most_distinct(frames, count):
+    """Keeps the count frames whose colour histogram differs most from the previous candidate, in video order."""
+    if len(frames) <= count:
+        return frames
+    histograms = []
+    for frame in frames:
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, [16, 8], [0, 180, 0, 256])
+        histograms.append(cv2.normalize(hist, hist))
+    # The first candidate always opens a scene
+    changes = [1.0] + [cv2.compareHist(histograms[i - 1], histograms[i], cv2.HISTCMP_BHATTACHARYYA)
+                       for i in range(1, len(frames))]
+    keep = sorted(sorted(range(len(frames)), key=lambda i: changes[i], reverse=True)[:count])
+    return [frames[i] for i in keep]